@@ -0,0 +1,440 @@
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import time
+from sqlalchemy import insert, select
+from . import models
+
+"""
+Exportação e importação das tabelas de produtos e vendedores em CSV, NDJSON ou Arrow IPC (formato de
+stream do Apache Arrow, colunar), usadas pelas rotas /api/v1/catalog e pela linha de comando.
+
+A exportação lê a tabela com um cursor do lado do servidor (stream_results) em blocos de chunk_size
+linhas e converte cada bloco para o formato pedido assim que ele é lido; a tabela nunca é carregada
+inteira, então a memória depende só do tamanho do bloco. A importação lê o arquivo também em blocos e
+grava cada bloco com um único INSERT (executemany), numa única transação: se alguma linha for recusada,
+nada é gravado.
+
+Os triggers do banco (busca textual e agregados por vendedor) são atualizados pelos próprios INSERTs.
+A senha (hash) dos vendedores não é exportada, e os produtos só são importados se os vendedores existirem.
+
+No CSV, NULL é escrito como \\N (como no COPY do PostgreSQL e no MySQL), e um campo vazio é um texto vazio.
+
+O Arrow IPC precisa do pacote pyarrow, que é opcional.
+
+Uso:
+    python -m Product.catalog_io export products --output products.arrow
+    python -m Product.catalog_io import products products.arrow --chunk-size 10000
+"""
+
+try:
+    import pyarrow
+except ImportError:  # pragma: no cover - o pyarrow é opcional
+    pyarrow = None
+
+CATALOG_CHUNK_SIZE = int(os.getenv("CATALOG_CHUNK_SIZE", "5000"))  # linhas por bloco
+
+TABLES = {"products": models.Product.__table__, "sellers": models.Seller.__table__}
+# Colunas que não saem na exportação.
+EXCLUDED_COLUMNS = {"sellers": {"password"}}
+CSV_NULL = "\\N"
+
+# Formato -> (Content-Type, extensão do arquivo)
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+}
+EXTENSIONS = {"csv": "csv", "ndjson": "ndjson", "jsonl": "ndjson", "arrow": "arrow", "arrows": "arrow", "ipc": "arrow"}
+
+
+def _column_types(table, names) -> list:
+    """Função que retorna o tipo Python (int, float, str) de cada coluna, recusando colunas desconhecidas."""
+    types = []
+    for name in names:
+        if name not in table.columns:
+            raise ValueError(f"Coluna desconhecida na tabela {table.name}: {name!r}")
+        types.append(table.columns[name].type.python_type)
+    return types
+
+
+def _import_column_types(table, names) -> list:
+    """Função que confere as colunas de um arquivo importado e retorna os tipos delas.
+
+    Além das colunas desconhecidas, recusa arquivos sem alguma coluna obrigatória (NOT NULL sem valor
+    padrão), ex: a senha dos vendedores, que não sai na exportação.
+    """
+    types = _column_types(table, names)
+    missing = [column.name for column in table.columns
+               if not column.nullable and not column.primary_key and column.default is None
+               and column.server_default is None and column.name not in names]
+    if missing:
+        raise ValueError(f"Coluna obrigatória ausente na tabela {table.name}: {', '.join(missing)}")
+    return types
+
+
+def _not_null_columns(table) -> set:
+    # A chave primária pode vir nula: o banco gera o ID.
+    return {column.name for column in table.columns if not column.nullable and not column.primary_key}
+
+
+def _convert_row(types: dict, values, convert, not_null: set) -> dict:
+    """Função que converte os valores de uma linha para os tipos das colunas, recusando NULL em colunas NOT NULL.
+
+    Args:
+        types (dict): Coluna -> tipo Python, de _import_column_types
+        values: Pares (coluna, valor lido do arquivo)
+        convert (callable): Conversão de um valor, recebe (tipo, valor)
+        not_null (set): Colunas que não aceitam NULL
+
+    Raises:
+        ValueError: Com a coluna do valor inválido
+    """
+    row = {}
+    for name, value in values:
+        try:
+            value = convert(types[name], value)
+        except (TypeError, ValueError) as error:
+            raise ValueError(f"coluna {name}: {error}") from None
+        if value is None and name in not_null:
+            raise ValueError(f"coluna {name} não pode ser nula")
+        row[name] = value
+    return row
+
+
+def _require_pyarrow():
+    if pyarrow is None:
+        raise ValueError("O formato arrow precisa do pacote pyarrow (pip install pyarrow)")
+
+
+def _write_csv(columns, chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in chunks:
+        writer.writerows([CSV_NULL if value is None else value for value in row] for row in chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+def _write_ndjson(columns, chunks):
+    for chunk in chunks:
+        yield "".join(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n" for row in chunk).encode()
+
+
+class _ByteSink:
+    """Classe de arquivo em memória que entrega e esquece o que o escritor do Arrow gravou até agora."""
+
+    closed = False
+
+    def __init__(self):
+        self._parts = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _arrow_schema(columns, types):
+    arrow_types = {int: pyarrow.int64(), float: pyarrow.float64(), str: pyarrow.string()}
+    return pyarrow.schema([(name, arrow_types[python_type]) for name, python_type in zip(columns, types)])
+
+
+def _write_arrow(columns, chunks, types):
+    schema = _arrow_schema(columns, types)
+    sink = _ByteSink()
+    with pyarrow.ipc.new_stream(sink, schema) as writer:
+        yield sink.take()
+        for chunk in chunks:
+            # Cada bloco vira um RecordBatch, montado coluna a coluna.
+            values = list(zip(*chunk))
+            writer.write_batch(pyarrow.RecordBatch.from_arrays(
+                [pyarrow.array(column, type=field.type) for column, field in zip(values, schema)], schema=schema))
+            yield sink.take()
+    yield sink.take()
+
+
+def _count_rows(chunks, progress: dict):
+    progress["rows"] = 0
+    for chunk in chunks:
+        progress["rows"] += len(chunk)
+        yield chunk
+
+
+def export_table(connection, table_name: str, fmt: str, chunk_size: int = CATALOG_CHUNK_SIZE,
+                 progress: dict = None):
+    """Gerador que exporta uma tabela em blocos, já no formato pedido.
+
+    Args:
+        connection (Connection): Conexão síncrona com o banco de dados
+        table_name (str): "products" ou "sellers"
+        fmt (str): "csv", "ndjson" ou "arrow"
+        chunk_size (int, optional): Linhas lidas do banco por vez. Defaults to CATALOG_CHUNK_SIZE.
+        progress (dict, optional): Se informado, recebe em "rows" a quantidade de linhas já exportadas.
+
+    Raises:
+        ValueError: Se o formato for arrow e o pyarrow não estiver instalado
+
+    Yields:
+        bytes: Partes do arquivo exportado, na ordem
+
+    Example:
+        with engine.connect() as connection, open("products.csv", "wb") as file:
+            for data in export_table(connection, "products", "csv"):
+                file.write(data)
+    """
+    if fmt == "arrow":
+        _require_pyarrow()
+    table = TABLES[table_name]
+    excluded = EXCLUDED_COLUMNS.get(table_name, set())
+    selected = [column for column in table.columns if column.name not in excluded]
+    columns = [column.name for column in selected]
+    result = (connection.execution_options(stream_results=True, max_row_buffer=chunk_size)
+              .execute(select(*selected).order_by(table.c.id)))
+    chunks = result.partitions(chunk_size)
+    if progress is not None:
+        chunks = _count_rows(chunks, progress)
+    try:
+        if fmt == "csv":
+            yield from _write_csv(columns, chunks)
+        elif fmt == "ndjson":
+            yield from _write_ndjson(columns, chunks)
+        else:
+            yield from _write_arrow(columns, chunks, _column_types(table, columns))
+    finally:
+        result.close()
+
+
+def _csv_value(python_type, value: str):
+    if value == CSV_NULL:
+        return None
+    if python_type is str:
+        return value
+    # Um número vazio não existe, então o campo vazio numa coluna numérica também é NULL.
+    return python_type(value) if value != "" else None
+
+
+def _read_csv(file, table, chunk_size: int):
+    reader = csv.reader(io.TextIOWrapper(file, encoding="utf-8", newline=""))
+    header = next(reader, None)
+    if header is None:
+        return
+    types = dict(zip(header, _import_column_types(table, header)))
+    not_null = _not_null_columns(table)
+    chunk = []
+    for row in reader:
+        line = reader.line_num
+        if len(row) != len(header):
+            raise ValueError(f"Linha {line}: {len(row)} campos, o cabeçalho tem {len(header)}")
+        try:
+            chunk.append(_convert_row(types, zip(header, row), _csv_value, not_null))
+        except ValueError as error:
+            raise ValueError(f"Linha {line}: {error}") from None
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _json_value(python_type, value):
+    if value is None:
+        return None
+    # Objetos e listas não cabem numa coluna; o str() deles gravaria a representação do Python.
+    if isinstance(value, (dict, list)):
+        raise ValueError(f"{type(value).__name__} não é um valor válido")
+    if python_type is int and isinstance(value, float) and not value.is_integer():
+        raise ValueError(f"{value} não é um inteiro")
+    return python_type(value)
+
+
+def _read_ndjson(file, table, chunk_size: int):
+    types = None
+    not_null = _not_null_columns(table)
+    chunk = []
+    for line, raw in enumerate(file, start=1):
+        if not raw.strip():
+            continue
+        try:
+            row = json.loads(raw)
+        except ValueError as error:
+            raise ValueError(f"Linha {line}: JSON inválido ({error})") from None
+        if not isinstance(row, dict):
+            raise ValueError(f"Linha {line}: cada linha deve ser um objeto JSON")
+        if types is None:
+            types = dict(zip(row, _import_column_types(table, list(row))))
+        elif row.keys() != types.keys():
+            # O executemany grava todas as linhas com as mesmas colunas.
+            raise ValueError(f"Linha {line}: as colunas são diferentes das da primeira linha")
+        try:
+            chunk.append(_convert_row(types, row.items(), _json_value, not_null))
+        except ValueError as error:
+            raise ValueError(f"Linha {line}: {error}") from None
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _read_arrow(file, table, chunk_size: int):
+    _require_pyarrow()
+    try:
+        reader = pyarrow.ipc.open_stream(file)
+    except pyarrow.ArrowInvalid as error:
+        raise ValueError(f"Arquivo Arrow inválido: {error}") from None
+    names = reader.schema.names
+    schema = _arrow_schema(names, _import_column_types(table, names))
+    not_null = _not_null_columns(table) & set(names)
+    for batch in reader:
+        try:
+            # Converte as colunas para os tipos da tabela (ex: preço gravado como texto no arquivo).
+            batch = pyarrow.Table.from_batches([batch]).cast(schema)
+        except (pyarrow.ArrowInvalid, pyarrow.ArrowNotImplementedError) as error:
+            raise ValueError(f"Arquivo Arrow com valores inválidos: {error}") from None
+        for name in not_null:
+            if batch.column(name).null_count:
+                raise ValueError(f"Arquivo Arrow: coluna {name} não pode ser nula")
+        for offset in range(0, batch.num_rows, chunk_size):
+            yield batch.slice(offset, chunk_size).to_pylist()
+
+
+READERS = {"csv": _read_csv, "ndjson": _read_ndjson, "arrow": _read_arrow}
+
+
+def _check_sellers(connection, rows, known_sellers: set, first_row: int):
+    """Função que recusa o bloco se algum produto for de um vendedor que não existe.
+
+    Como em bulkAddProducts, os vendedores do bloco são conferidos com uma única consulta (WHERE id IN ...)
+    e os já conferidos não são consultados de novo. A chave estrangeira não resolve: ela fica desligada
+    no SQLite, e um produto sem vendedor quebraria a listagem de produtos.
+    """
+    sellers = TABLES["sellers"]
+    missing = {row.get("seller_id") for row in rows} - known_sellers - {None}
+    if missing:
+        known_sellers.update(connection.execute(select(sellers.c.id).where(sellers.c.id.in_(missing))).scalars())
+    for number, row in enumerate(rows, start=first_row):
+        seller_id = row.get("seller_id")
+        if seller_id is None:
+            raise ValueError(f"Registro {number}: seller_id não informado")
+        if seller_id not in known_sellers:
+            raise ValueError(f"Registro {number}: vendedor {seller_id} não encontrado")
+
+
+def import_table(connection, table_name: str, fmt: str, file, chunk_size: int = CATALOG_CHUNK_SIZE,
+                 keep_ids: bool = True) -> int:
+    """Função que importa um arquivo para uma tabela, com um INSERT (executemany) por bloco.
+
+    A transação é de quem chama (ex: engine.begin()), para a importação inteira ser gravada ou desfeita
+    de uma vez.
+
+    Args:
+        connection (Connection): Conexão síncrona com o banco de dados, dentro de uma transação
+        table_name (str): "products" ou "sellers"
+        fmt (str): "csv", "ndjson" ou "arrow"
+        file: Arquivo binário aberto para leitura
+        chunk_size (int, optional): Linhas gravadas por INSERT. Defaults to CATALOG_CHUNK_SIZE.
+        keep_ids (bool, optional): Se False, ignora a coluna id e o banco gera IDs novos. Defaults to True.
+
+    Raises:
+        ValueError: Se o arquivo tiver colunas desconhecidas ou faltando, linhas inválidas ou produtos de
+            vendedores que não existem
+        IntegrityError: Se alguma linha violar uma restrição do banco (ex: ID ou e-mail repetido)
+
+    Returns:
+        int: Quantidade de linhas importadas
+    """
+    table = TABLES[table_name]
+    statement = insert(table)
+    known_sellers = set()
+    count = 0
+    for rows in READERS[fmt](file, table, chunk_size):
+        if table_name == "products":
+            _check_sellers(connection, rows, known_sellers, count + 1)
+        if not keep_ids:
+            for row in rows:
+                row.pop("id", None)
+        connection.execute(statement, rows)
+        count += len(rows)
+    return count
+
+
+def format_from_path(path: str) -> str:
+    """Função que deduz o formato pela extensão do arquivo (ex: products.csv -> "csv")."""
+    extension = path.rsplit(".", 1)[-1].lower()
+    if extension not in EXTENSIONS:
+        raise ValueError(f"Não foi possível deduzir o formato de {path!r}; use --format")
+    return EXTENSIONS[extension]
+
+
+def _report(action: str, rows: int, elapsed: float):
+    message = f"{action}: {rows} linhas em {elapsed:.2f}s ({rows / elapsed if elapsed else 0:,.0f} linhas/s)"
+    try:
+        import resource  # só existe no Unix; no Windows o pico de memória não é mostrado
+    except ImportError:  # pragma: no cover
+        pass
+    else:
+        # No Linux o ru_maxrss vem em KiB.
+        message += f", pico de memória {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.1f} MB"
+    print(message, file=sys.stderr)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    export_parser = subparsers.add_parser("export", help="Exporta uma tabela")
+    export_parser.add_argument("table", choices=list(TABLES))
+    export_parser.add_argument("--output", help="Arquivo de saída (padrão: saída padrão)")
+    import_parser = subparsers.add_parser("import", help="Importa um arquivo para uma tabela")
+    import_parser.add_argument("table", choices=list(TABLES))
+    import_parser.add_argument("input", help="Arquivo de entrada")
+    import_parser.add_argument("--new-ids", action="store_true", help="Ignora a coluna id e gera IDs novos")
+    for subparser in (export_parser, import_parser):
+        subparser.add_argument("--format", choices=list(FORMATS),
+                               help="Formato do arquivo (padrão: pela extensão; ndjson na saída padrão)")
+        subparser.add_argument("--chunk-size", type=int, default=CATALOG_CHUNK_SIZE, help="Linhas por bloco")
+    args = parser.parse_args()
+
+    from .database import engine
+    from .migrations import migrate
+
+    try:
+        if args.command == "export":
+            fmt = args.format or (format_from_path(args.output) if args.output else "ndjson")
+            output = open(args.output, "wb") if args.output else sys.stdout.buffer
+            progress = {}
+            start = time.perf_counter()
+            with engine.connect() as connection:
+                for data in export_table(connection, args.table, fmt, args.chunk_size, progress):
+                    output.write(data)
+            if args.output:
+                output.close()
+            _report("Exportação", progress["rows"], time.perf_counter() - start)
+        else:
+            fmt = args.format or format_from_path(args.input)
+            # Permite importar num banco novo, ainda sem as tabelas.
+            migrate(engine)
+            start = time.perf_counter()
+            with open(args.input, "rb") as file, engine.begin() as connection:
+                rows = import_table(connection, args.table, fmt, file, args.chunk_size, keep_ids=not args.new_ids)
+            _report("Importação", rows, time.perf_counter() - start)
+    except ValueError as error:
+        parser.error(str(error))
+
+
+if __name__ == "__main__":
+    main()
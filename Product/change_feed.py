@@ -0,0 +1,155 @@
+import asyncio
+import json
+import os
+import time
+from typing import Optional
+from fastapi import Request
+from fastapi.responses import StreamingResponse
+
+"""
+Feed de alterações (change feed) em Server-Sent Events, usado pelas duas aplicações: os produtos do
+Product.main:app e os filmes do main:app da raiz.
+
+Em vez de baixar a listagem inteira de tempos em tempos para descobrir o que mudou, o cliente abre uma
+conexão SSE e recebe cada criação, alteração ou remoção assim que ela acontece. As rotas de escrita
+publicam os eventos num buffer circular de tamanho fixo (CHANGE_FEED_SIZE) dentro do processo. Cada evento
+tem um número de sequência crescente (o "id" do SSE) e é convertido em bytes uma única vez na publicação:
+todos os clientes conectados recebem o mesmo objeto, sem uma cópia ou fila por cliente.
+
+O cliente informa o último número recebido (?since=N ou o cabeçalho Last-Event-ID, que o EventSource do
+navegador manda sozinho ao reconectar) e recebe os eventos seguintes. Se eles já saíram do buffer (o
+cliente ficou muito tempo desconectado ou lendo devagar), ou o número é de antes de um reinício, o cliente
+recebe um evento "reset" e deve baixar a listagem de novo.
+
+O buffer é do processo: com vários workers, cada um tem o seu feed e só vê as próprias escritas.
+"""
+
+CHANGE_FEED_SIZE = int(os.getenv("CHANGE_FEED_SIZE", "1000"))  # eventos guardados
+CHANGE_FEED_HEARTBEAT = float(os.getenv("CHANGE_FEED_HEARTBEAT", "15"))  # segundos
+# Tempo, em milissegundos, que o EventSource espera antes de reconectar.
+CHANGE_FEED_RETRY = int(os.getenv("CHANGE_FEED_RETRY", "3000"))
+
+
+class ChangeFeed:
+    """Classe do buffer circular de eventos de alteração, com espera compartilhada pelos assinantes.
+
+    Os números de sequência começam na data de início do feed, em milissegundos. Assim, depois de um
+    reinício, os números novos são maiores que os anteriores e um cliente que volte com um número antigo
+    cai no "reset" em vez de receber eventos que não são os que ele perdeu.
+
+    Args:
+        capacity (int): Quantidade máxima de eventos guardados
+
+    Example:
+        product_changes.publish("create", {"id": 1, "name": "Cadeira"})
+        ...
+        return product_changes.response(request, since)
+    """
+
+    def __init__(self, capacity: int = CHANGE_FEED_SIZE):
+        self.capacity = capacity
+        self._events = [None] * capacity  # posição seq % capacity -> evento SSE já em bytes
+        self.last_seq = int(time.time() * 1000)
+        self._first_seq = self.last_seq + 1
+        self._changed = asyncio.Event()
+        self.subscribers = 0
+
+    def publish(self, event_type: str, data: dict) -> int:
+        """Função que registra um evento e acorda os assinantes; deve ser chamada no event loop.
+
+        Args:
+            event_type (str): Tipo do evento, ex: "create", "update" ou "delete"
+            data (dict): Dados do evento (serializados em JSON)
+
+        Returns:
+            int: Número de sequência do evento
+        """
+        seq = self.last_seq + 1
+        payload = json.dumps(data, ensure_ascii=False, default=str, separators=(",", ":"))
+        self._events[seq % self.capacity] = f"id: {seq}\nevent: {event_type}\ndata: {payload}\n\n".encode()
+        self.last_seq = seq
+        self._first_seq = max(self._first_seq, seq - self.capacity + 1)
+        # Todos os assinantes esperam o mesmo asyncio.Event: um set() acorda todos, e o evento é trocado
+        # por um novo para a próxima espera.
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+        return seq
+
+    def events_since(self, since: int):
+        """Função que retorna os eventos depois de `since`, ou None se eles não estão mais no buffer.
+
+        Args:
+            since (int): Último número de sequência recebido pelo cliente
+
+        Returns:
+            list: Eventos SSE (bytes) em ordem, ou None quando o cliente precisa de um "reset"
+        """
+        if since > self.last_seq or since < self._first_seq - 1:
+            return None
+        return [self._events[seq % self.capacity] for seq in range(since + 1, self.last_seq + 1)]
+
+    async def wait(self, since: int, timeout: float) -> bool:
+        """Função que espera um evento depois de `since` por até `timeout` segundos.
+
+        Returns:
+            bool: True se há eventos novos, False se o tempo acabou
+        """
+        if self.last_seq > since:
+            return True
+        try:
+            await asyncio.wait_for(self._changed.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        return True
+
+    def _reset_event(self) -> bytes:
+        return f"id: {self.last_seq}\nevent: reset\ndata: {{\"seq\":{self.last_seq}}}\n\n".encode()
+
+    async def stream(self, since: Optional[int], heartbeat: float = CHANGE_FEED_HEARTBEAT):
+        """Gerador que envia os eventos depois de `since` e continua enviando os novos até o cliente sair.
+
+        Args:
+            since (int, optional): Último número recebido; sem ele, só os eventos a partir de agora
+            heartbeat (float, optional): Intervalo, em segundos, dos comentários que mantêm a conexão viva
+        """
+        self.subscribers += 1
+        try:
+            # A primeira linha sai na hora, para o cliente (e os middlewares) receberem o início da resposta.
+            yield f"retry: {CHANGE_FEED_RETRY}\n\n".encode()
+            if since is None:
+                since = self.last_seq
+            while True:
+                events = self.events_since(since)
+                if events is None:
+                    yield self._reset_event()
+                    since = self.last_seq
+                    continue
+                for event in events:
+                    yield event
+                since += len(events)
+                if not await self.wait(since, heartbeat):
+                    yield b": ping\n\n"
+        finally:
+            self.subscribers -= 1
+
+    def response(self, request: Request, since: Optional[int]) -> StreamingResponse:
+        """Função que monta a resposta SSE, com o número inicial vindo de ?since= ou do Last-Event-ID.
+
+        Args:
+            request (Request): Requisição atual
+            since (int, optional): Último número recebido (?since=); tem precedência sobre o Last-Event-ID
+
+        Returns:
+            StreamingResponse: Resposta text/event-stream
+        """
+        if since is None:
+            last_event_id = request.headers.get("last-event-id", "")
+            since = int(last_event_id) if last_event_id.isdigit() else None
+        # X-Accel-Buffering desliga o buffer do nginx, que seguraria os eventos.
+        return StreamingResponse(self.stream(since), media_type="text/event-stream",
+                                 headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# Um feed por aplicação.
+product_changes = ChangeFeed()
+movie_changes = ChangeFeed()
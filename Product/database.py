@@ -1,6 +1,10 @@
-from sqlalchemy import create_engine, engine
+import os
+import time
+from fastapi import Request, Response
+from sqlalchemy import create_engine, event
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 
 """
 O script configura uma conexão com um banco de dados SQLite, cria uma classe de sessão para 
@@ -25,14 +29,200 @@ def get_db():
     finally:
         db.close()
 
-SQLARCH_DATABASE_URL = "sqlite:///./product.db"
+async def get_async_db(response: Response):
+    """Função que cria uma sessão assíncrona de banco de dados.
+
+    As rotas async def usam esta sessão para não bloquear o event loop (nem ocupar uma
+    thread do threadpool) enquanto esperam o banco de dados. A sessão é sempre do banco
+    primário; com réplicas de leitura configuradas, um commit nesta sessão faz as próximas
+    leituras do mesmo cliente irem ao primário (veja get_read_db).
+
+    Returns:
+        AsyncSession: Sessão assíncrona do banco de dados
+    """
+    async with AsyncSessionLocal() as db:
+        if read_router is not None:
+            db.sync_session.info["response"] = response
+        yield db
+
+async def get_read_db(request: Request):
+    """Função que cria uma sessão assíncrona só para leitura, usada pelas rotas GET.
+
+    Com réplicas configuradas (SQLARCH_READ_REPLICA_URLS), a sessão usa uma réplica escolhida pelo
+    read_router, e as leituras deixam de disputar o pool de conexões do primário com as escritas. O
+    cliente que fez uma escrita há menos de READ_YOUR_WRITES_SECONDS segundos lê do primário, para
+    enxergar a própria alteração mesmo que a réplica ainda não a tenha recebido. Sem réplicas, é igual
+    à get_async_db.
+
+    Returns:
+        AsyncSession: Sessão assíncrona do banco de dados (réplica ou primário)
+    """
+    bind = async_engine if read_router is None or reads_from_primary(request) else read_router.choose()
+    async with AsyncSessionLocal(bind=bind) as db:
+        yield db
+
+# URL do banco de dados, configurável por variável de ambiente. O padrão é o SQLite local.
+SQLARCH_DATABASE_URL = os.getenv("SQLARCH_DATABASE_URL", "sqlite:///./product.db")
+
+# Versão assíncrona da mesma conexão. Localmente usa o driver aiosqlite; em produção basta
+# apontar a variável de ambiente para outro driver assíncrono (ex: postgresql+asyncpg://...).
+SQLARCH_ASYNC_DATABASE_URL = os.getenv("SQLARCH_ASYNC_DATABASE_URL",
+                                       SQLARCH_DATABASE_URL.replace("sqlite://", "sqlite+aiosqlite://", 1))
+
+# Configuração do pool de conexões, igual para o engine síncrono e o assíncrono (este pode ser
+# sobrescrito com as variáveis SQLARCH_ASYNC_*). O pre-ping testa a conexão antes de usá-la, para não
+# entregar à rota uma conexão que o banco já fechou.
+POOL_SIZE = int(os.getenv("SQLARCH_POOL_SIZE", "5"))
+MAX_OVERFLOW = int(os.getenv("SQLARCH_MAX_OVERFLOW", "10"))
+POOL_PRE_PING = os.getenv("SQLARCH_POOL_PRE_PING", "true").lower() == "true"
+ASYNC_POOL_SIZE = int(os.getenv("SQLARCH_ASYNC_POOL_SIZE", str(POOL_SIZE)))
+ASYNC_MAX_OVERFLOW = int(os.getenv("SQLARCH_ASYNC_MAX_OVERFLOW", str(MAX_OVERFLOW)))
+
+# Perfil de ajuste do SQLite. No perfil "production" cada nova conexão recebe os PRAGMAs abaixo:
+# - journal_mode=WAL: leitores não bloqueiam escritores e vice-versa;
+# - synchronous=NORMAL: no modo WAL continua seguro contra corrupção, com bem menos fsyncs;
+# - mmap_size: lê o arquivo via memória mapeada, sem copiar páginas para o processo;
+# - cache_size: valor negativo é em KiB (-64000 = ~64 MB de cache de páginas por conexão);
+# - busy_timeout: espera (em ms) o lock de escrita em vez de falhar na hora com "database is locked".
+# Com SQLITE_PROFILE=default o SQLite roda com a configuração padrão dele.
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "production")
+SQLITE_PRAGMAS = {
+    "journal_mode": os.getenv("SQLITE_JOURNAL_MODE", "WAL"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL"),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    "cache_size": int(os.getenv("SQLITE_CACHE_SIZE", "-64000")),
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT", "5000")),
+}
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    """Função chamada a cada nova conexão com o SQLite para aplicar os PRAGMAs do perfil."""
+    cursor = dbapi_connection.cursor()
+    for pragma, value in SQLITE_PRAGMAS.items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
+    cursor.close()
+
+
+def _create_engine(url: str, create, pool_size: int, max_overflow: int):
+    """Função que cria o engine (síncrono ou assíncrono) com o pool e, no SQLite, o perfil de PRAGMAs.
+
+    Args:
+        url (str): URL do banco de dados
+        create (callable): create_engine ou create_async_engine
+        pool_size (int): Quantidade de conexões mantidas abertas no pool
+        max_overflow (int): Conexões extras permitidas acima do pool_size em momentos de pico
+
+    Returns:
+        Engine: Engine configurado
+    """
+    is_sqlite = url.startswith("sqlite")
+    new_engine = create(
+        url,
+        # O check_same_thread=False deixa a mesma conexão SQLite ser usada por threads diferentes do pool.
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_pre_ping=POOL_PRE_PING,
+    )
+    if is_sqlite and SQLITE_PROFILE == "production":
+        # O engine assíncrono dispara os eventos de conexão no seu sync_engine interno.
+        event.listen(getattr(new_engine, "sync_engine", new_engine), "connect", _set_sqlite_pragmas)
+    return new_engine
+
 
 # Cria uma instancia de conexão com o banco de dados SQLite
-engine = create_engine(SQLARCH_DATABASE_URL, connect_args={"check_same_thread": False})
+engine = _create_engine(SQLARCH_DATABASE_URL, create_engine, POOL_SIZE, MAX_OVERFLOW)
 
 # criando uma sessão local para interações com o banco de dados
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = _create_engine(SQLARCH_ASYNC_DATABASE_URL, create_async_engine, ASYNC_POOL_SIZE, ASYNC_MAX_OVERFLOW)
+
+# expire_on_commit=False evita que os objetos sejam recarregados (de forma implícita, o que não é
+# permitido no modo assíncrono) ao acessar seus atributos depois do commit.
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+# Réplicas de leitura, separadas por vírgula (ex: "sqlite:///./replica1.db,sqlite:///./replica2.db").
+# Como no primário, a URL assíncrona é derivada da síncrona, a menos que SQLARCH_ASYNC_READ_REPLICA_URLS
+# seja informada. A replicação em si é feita fora da aplicação (pelo banco, ou pelo Product.replica_sync
+# nos testes locais com SQLite).
+READ_REPLICA_URLS = [url.strip() for url in os.getenv("SQLARCH_READ_REPLICA_URLS", "").split(",") if url.strip()]
+ASYNC_READ_REPLICA_URLS = [url.strip() for url in os.getenv(
+    "SQLARCH_ASYNC_READ_REPLICA_URLS",
+    ",".join(url.replace("sqlite://", "sqlite+aiosqlite://", 1) for url in READ_REPLICA_URLS)).split(",")
+    if url.strip()]
+# "round_robin" (uma réplica de cada vez) ou "least_busy" (a réplica com menos conexões em uso).
+READ_ROUTING = os.getenv("SQLARCH_READ_ROUTING", "round_robin")
+# Tempo, em segundos, em que o cliente lê do primário depois de uma escrita. Deve ser maior que o atraso
+# (lag) normal das réplicas.
+READ_YOUR_WRITES_SECONDS = float(os.getenv("SQLARCH_READ_YOUR_WRITES_SECONDS", "5"))
+READ_YOUR_WRITES_COOKIE = "db_primary_until"
+# Pool do engine de cada réplica; sem configuração, igual ao do engine assíncrono do primário.
+READ_POOL_SIZE = int(os.getenv("SQLARCH_READ_POOL_SIZE", str(ASYNC_POOL_SIZE)))
+READ_MAX_OVERFLOW = int(os.getenv("SQLARCH_READ_MAX_OVERFLOW", str(ASYNC_MAX_OVERFLOW)))
+
+
+def _checked_out(read_engine) -> int:
+    # Conexões do pool em uso no momento (pools sem contagem, como o NullPool, contam como livres).
+    pool = read_engine.sync_engine.pool
+    return pool.checkedout() if hasattr(pool, "checkedout") else 0
+
+
+class ReadRouter:
+    """Classe que escolhe a réplica usada por cada sessão de leitura.
+
+    Args:
+        engines (list): Engines assíncronos das réplicas
+        strategy (str): "round_robin" ou "least_busy"
+
+    Raises:
+        ValueError: Se a estratégia não existir ou a lista de réplicas estiver vazia
+    """
+
+    STRATEGIES = ("round_robin", "least_busy")
+
+    def __init__(self, engines: list, strategy: str = READ_ROUTING):
+        if strategy not in self.STRATEGIES:
+            raise ValueError(f"SQLARCH_READ_ROUTING={strategy!r} inválido; use {' ou '.join(self.STRATEGIES)}")
+        if not engines:
+            raise ValueError("Nenhuma réplica de leitura configurada")
+        self.engines = engines
+        self.strategy = strategy
+        self._next = 0
+
+    def choose(self):
+        """Função que retorna o engine da réplica da próxima sessão de leitura."""
+        count = len(self.engines)
+        start = self._next
+        self._next = (start + 1) % count
+        if self.strategy == "round_robin":
+            return self.engines[start]
+        # A busca começa numa réplica diferente a cada vez, então os empates (ex: todas livres) são
+        # distribuídos entre elas em vez de ficarem sempre com a primeira.
+        return min((self.engines[(start + i) % count] for i in range(count)), key=_checked_out)
+
+
+read_engines = [_create_engine(url, create_async_engine, READ_POOL_SIZE, READ_MAX_OVERFLOW)
+                for url in ASYNC_READ_REPLICA_URLS]
+read_router = ReadRouter(read_engines) if read_engines else None
+
+
+def reads_from_primary(request: Request) -> bool:
+    """Função que indica se o cliente fez uma escrita recente e deve ler do primário (read-your-writes)."""
+    try:
+        return float(request.cookies.get(READ_YOUR_WRITES_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+@event.listens_for(Session, "after_commit")
+def _stick_to_primary(session):
+    # A marca vai num cookie (e não na memória do processo) para valer em qualquer worker ou servidor.
+    response = session.info.get("response")
+    if response is not None:
+        response.set_cookie(READ_YOUR_WRITES_COOKIE, f"{time.time() + READ_YOUR_WRITES_SECONDS:.3f}",
+                            max_age=int(READ_YOUR_WRITES_SECONDS) + 1, httponly=True, samesite="lax")
+
 # Classe base para os modelos de dados, que será usada para criar tabelas no banco de dados
 # A classe base é parte do Object-Relational Mapping (ORM) do SQLAlchemy. Isso significa que ela 
 # permite que você trabalhe com objetos Python em vez de interagir diretamente com o banco de 
@@ -0,0 +1,120 @@
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from fastapi import HTTPException, status
+
+"""
+Serviço de hash de senhas. O bcrypt gasta dezenas de milissegundos de CPU por chamada e segura o GIL,
+então rodar na thread da requisição limita quantos logins um worker consegue atender. Aqui as chamadas
+vão para um pool de processos (um por núcleo por padrão), com um limite de chamadas pendentes: quando o
+pool está saturado a requisição recebe 503 na hora, em vez de ficar numa fila sem fim.
+"""
+
+# Custo do bcrypt (2^rounds iterações). Ao aumentar este valor, as senhas antigas são refeitas
+# automaticamente no próximo login (veja verify_and_update), sem precisar de migração.
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# Quantidade de processos do pool e limite de chamadas pendentes antes de responder 503.
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+
+# Contexto de criptografia para senhas, usando bcrypt como algoritmo de hash.
+# O bcrypt é um algoritmo de hash seguro e amplamente utilizado para armazenar senhas.
+# O bcrypt a ser instalado deve ser a versão 4.0.1 para não dar o warning
+# AttributeError: module 'bcrypt' has no attribute '__about__'
+# O min_rounds faz o needs_update apontar hashes com custo menor que o configurado.
+# O contexto é único e só é criado no primeiro uso (o passlib e o bcrypt nem são importados antes
+# disso), o que deixa a importação da aplicação mais rápida.
+@lru_cache(maxsize=None)
+def get_pwd_context():
+    from passlib.context import CryptContext # serve para transformar senhas em hash.
+
+    return CryptContext(schemes=["bcrypt"], deprecated="auto",
+                        bcrypt__default_rounds=BCRYPT_ROUNDS,
+                        bcrypt__min_rounds=BCRYPT_ROUNDS)
+
+
+# As funções abaixo rodam dentro dos processos do pool, por isso ficam no nível do módulo
+# (precisam ser importáveis pelo processo filho).
+def _hash(password: str) -> str:
+    return get_pwd_context().hash(password)
+
+
+def _verify_and_update(password: str, hashed: str):
+    return get_pwd_context().verify_and_update(password, hashed)
+
+
+class PasswordHasher:
+    """Classe que executa o hash e a verificação de senhas num pool de processos limitado.
+
+    Args:
+        max_workers (int): Quantidade de processos do pool
+        max_pending (int): Quantidade máxima de chamadas em andamento ou esperando na fila
+    """
+
+    def __init__(self, max_workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        # O pool só é criado na primeira chamada, assim importar o módulo não cria processos.
+        # O "spawn" evita copiar para os filhos o estado do event loop e das conexões do processo pai.
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def _submit(self, func, *args):
+        """Função que envia uma chamada ao pool respeitando o limite de chamadas pendentes.
+
+        Raises:
+            HTTPException: 503 quando o pool já está com max_pending chamadas
+        """
+        if self.pending >= self.max_pending:
+            raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                                detail="Servidor ocupado, tente novamente em instantes",
+                                headers={"Retry-After": "1"})
+        self.pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, func, *args)
+        finally:
+            self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        """Função que gera o hash bcrypt de uma senha.
+
+        Args:
+            password (str): Senha em texto simples
+
+        Returns:
+            str: Hash da senha
+        """
+        return await self._submit(_hash, password)
+
+    async def verify_and_update(self, password: str, hashed: str):
+        """Função que verifica uma senha e, se o hash estiver desatualizado, gera um novo.
+
+        Args:
+            password (str): Senha em texto simples
+            hashed (str): Hash armazenado no banco de dados
+
+        Returns:
+            tuple: (senha válida, novo hash ou None se o atual ainda estiver de acordo com o get_pwd_context())
+        """
+        return await self._submit(_verify_and_update, password, hashed)
+
+    def shutdown(self):
+        """Função que encerra os processos do pool."""
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+
+# Instância única compartilhada pelas rotas.
+password_hasher = PasswordHasher()
@@ -0,0 +1,266 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from starlette.datastructures import Headers, MutableHeaders
+
+"""
+Compressão negociada e respostas condicionais por data, usadas pelas duas aplicações (Product.main:app e
+o main:app da raiz).
+
+- CompressionMiddleware: comprime as respostas JSON maiores que COMPRESSION_MIN_SIZE com o melhor formato
+  aceito pelo cliente (Accept-Encoding): zstd, br (brotli) ou gzip. As versões comprimidas ficam num cache
+  LRU (chave = conteúdo + formato), então uma listagem que não mudou não é comprimida de novo a cada
+  requisição. Respostas em streaming passam sem compressão.
+- last_modified_headers / is_not_modified: fluxo Last-Modified / If-Modified-Since a partir da data da
+  última alteração do catálogo, que permite responder 304 sem montar a resposta.
+
+O brotli (pacote brotli) e o zstd (pacote zstandard) são dependências opcionais; sem eles, só o gzip é
+oferecido.
+"""
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - o brotli é opcional
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - o zstandard é opcional
+    zstandard = None
+
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # bytes
+# Formatos oferecidos, em ordem de preferência do servidor (usada quando o cliente aceita vários com o
+# mesmo peso). Uma lista vazia desliga a compressão.
+COMPRESSION_ENCODINGS = [name.strip() for name in os.getenv("COMPRESSION_ENCODINGS", "zstd,br,gzip").split(",")
+                         if name.strip()]
+COMPRESSION_LEVELS = {
+    "gzip": int(os.getenv("COMPRESSION_GZIP_LEVEL", "6")),  # 1 a 9
+    "br": int(os.getenv("COMPRESSION_BR_LEVEL", "5")),  # 0 a 11
+    "zstd": int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3")),  # 1 a 22
+}
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(64 * 1024 * 1024)))
+# Corpos maiores que isso são comprimidos numa thread, para não travar o event loop.
+COMPRESSION_THREAD_MIN_SIZE = 64 * 1024
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+def _compress_gzip(body: bytes, level: int) -> bytes:
+    # mtime=0 deixa a saída igual para o mesmo conteúdo.
+    return gzip.compress(body, compresslevel=level, mtime=0)
+
+
+def _compress_brotli(body: bytes, level: int) -> bytes:
+    return brotli.compress(body, quality=level)
+
+
+def _compress_zstd(body: bytes, level: int) -> bytes:
+    return zstandard.ZstdCompressor(level=level).compress(body)
+
+
+CODECS = {"gzip": _compress_gzip}
+if brotli is not None:
+    CODECS["br"] = _compress_brotli
+if zstandard is not None:
+    CODECS["zstd"] = _compress_zstd
+
+
+def negotiate_encoding(accept_encoding: str, encodings) -> str:
+    """Função que escolhe o formato de compressão a partir do cabeçalho Accept-Encoding.
+
+    Args:
+        accept_encoding (str): Valor do cabeçalho, ex: "gzip, br;q=0.9, *;q=0.1"
+        encodings (list): Formatos disponíveis, em ordem de preferência do servidor
+
+    Returns:
+        str: Formato escolhido, ou None para responder sem compressão
+
+    Example:
+        negotiate_encoding("gzip, br", ["zstd", "br", "gzip"])  # "br"
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0.0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressedVariants:
+    """Classe de cache LRU das versões comprimidas das respostas, limitada pelo total de bytes guardados.
+
+    Args:
+        max_bytes (int): Total máximo de bytes comprimidos guardados
+    """
+
+    def __init__(self, max_bytes: int = COMPRESSION_CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # (conteúdo, formato, nível) -> bytes comprimidos
+
+    def get(self, key):
+        value = self._entries.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return value
+
+    def put(self, key, value: bytes):
+        if len(value) > self.max_bytes:
+            return
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self.size -= len(old)
+        self._entries[key] = value
+        self.size += len(value)
+        while self.size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.size -= len(evicted)
+
+
+# Instância única compartilhada pelas duas aplicações do processo.
+compressed_variants = CompressedVariants()
+
+
+class CompressionMiddleware:
+    """Middleware ASGI que comprime as respostas grandes no formato negociado com o cliente.
+
+    Args:
+        app: Aplicação ASGI
+        minimum_size (int): Tamanho mínimo do corpo (bytes) para comprimir
+        encodings (list): Formatos oferecidos, em ordem de preferência do servidor
+        levels (dict): Nível de compressão de cada formato
+        variants (CompressedVariants): Cache das versões comprimidas
+    """
+
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE, encodings=None, levels=None,
+                 variants: CompressedVariants = compressed_variants):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.encodings = [name for name in (COMPRESSION_ENCODINGS if encodings is None else encodings)
+                          if name in CODECS]
+        self.levels = {**COMPRESSION_LEVELS, **(levels or {})}
+        self.variants = variants
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.encodings:
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""), self.encodings)
+        start_message = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                # O início da resposta só é enviado depois de ver o corpo (e decidir se comprime).
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            if (message.get("more_body", False) or start_message["status"] != 200
+                    or "content-encoding" in headers or len(body) < self.minimum_size
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)):
+                # Streaming, erros, respostas pequenas ou já comprimidas passam como estão.
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            headers.add_vary_header("Accept-Encoding")
+            if encoding is not None:
+                body = await self.compress(body, encoding, headers.get("etag"))
+                headers["Content-Encoding"] = encoding
+                headers["Content-Length"] = str(len(body))
+                etag = headers.get("etag")
+                if etag and not etag.startswith("W/"):
+                    # O corpo enviado não é mais byte a byte o do ETag forte, então ele passa a ser fraco.
+                    headers["ETag"] = "W/" + etag
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def compress(self, body: bytes, encoding: str, etag: str = None) -> bytes:
+        """Função que comprime o corpo, reaproveitando a versão comprimida guardada para o mesmo conteúdo.
+
+        O ETag (quando existe) já identifica o conteúdo; sem ele, a chave é um hash do corpo.
+        """
+        level = self.levels[encoding]
+        content = etag or hashlib.blake2b(body, digest_size=16).hexdigest()
+        key = (content, encoding, level)
+        compressed = self.variants.get(key)
+        if compressed is None:
+            if len(body) >= COMPRESSION_THREAD_MIN_SIZE:
+                compressed = await asyncio.to_thread(CODECS[encoding], body, level)
+            else:
+                compressed = CODECS[encoding](body, level)
+            self.variants.put(key, compressed)
+        return compressed
+
+
+def last_modified_headers(modified_at: float) -> dict:
+    """Função que monta o cabeçalho Last-Modified a partir da data da última alteração.
+
+    A data do HTTP tem precisão de segundos. Se a última alteração foi no segundo atual, outra alteração
+    ainda pode acontecer no mesmo segundo com a mesma data, então o cabeçalho não é enviado.
+
+    Args:
+        modified_at (float): Data da última alteração (time.time()), ou None se desconhecida
+
+    Returns:
+        dict: {"Last-Modified": ...} ou vazio
+    """
+    if modified_at is None or int(modified_at) >= int(time.time()):
+        return {}
+    return {"Last-Modified": formatdate(int(modified_at), usegmt=True)}
+
+
+def is_not_modified(headers, modified_at: float) -> bool:
+    """Função que indica se o cliente já tem a versão atual (If-Modified-Since igual ou depois da alteração).
+
+    Quando a requisição tem If-None-Match, o If-Modified-Since é ignorado (o ETag tem precedência).
+
+    Args:
+        headers: Cabeçalhos da requisição
+        modified_at (float): Data da última alteração (time.time()), ou None se desconhecida
+
+    Returns:
+        bool: True se a resposta pode ser 304
+    """
+    if_modified_since = headers.get("if-modified-since")
+    if not if_modified_since or "if-none-match" in headers or not last_modified_headers(modified_at):
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    return int(modified_at) <= since
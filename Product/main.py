@@ -1,7 +1,26 @@
+import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from . import models
-from .database import engine
-from .routers import product, seller, login
+from fastapi.concurrency import run_in_threadpool
+from .database import engine, async_engine, read_engines
+from .hashing import password_hasher
+from .migrations import migrate
+from .serializers import FAST_JSON, FastJSONResponse
+from .metrics import MetricsMiddleware, instrument_engine
+from .http_cache import CompressionMiddleware
+from .routers import product, seller, login, metrics, catalog
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Função que controla o ciclo de vida da aplicação (o que roda ao subir e ao desligar o servidor)."""
+    # Aplica as migrações que faltarem uma vez, ao subir (e não ao importar o módulo). Em produção as
+    # migrações podem rodar antes pelo comando "python -m Product.migrations", com AUTO_MIGRATE=false.
+    if os.getenv("AUTO_MIGRATE", "true").lower() == "true":
+        await run_in_threadpool(migrate, engine)
+    yield
+    # Encerra os processos do pool de hash de senhas ao desligar o servidor.
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -13,15 +32,24 @@ app = FastAPI(
         "website": "https://www.linkedin.com/in/lucas-rocha-b8285089/",
         "email": "lrgsps3@gmail.com"
     },
-    docs_url="/documentacao"  # URL para acessar a documentação da API
+    docs_url="/documentacao",  # URL para acessar a documentação da API
+    lifespan=lifespan,
+    # Com PRODUCT_FAST_JSON=true as respostas são serializadas com o orjson.
+    **({"default_response_class": FastJSONResponse} if FAST_JSON else {})
 )
 
 app.include_router(product.router)
 app.include_router(seller.router)
 app.include_router(login.router)
+app.include_router(metrics.router)
+app.include_router(catalog.router)
 
-# Esta linha vai criar o banco de dados, conectar com ele e criar as tabelas definidas nos modelos.
-models.Base.metadata.create_all(bind=engine)
-
-
-
+# Comprime as respostas grandes no formato aceito pelo cliente (gzip, br ou zstd).
+app.add_middleware(CompressionMiddleware)
+# Mede a latência de cada requisição e conta as consultas SQL feitas por ela (veja a rota /metrics).
+# Adicionado por último, fica por fora e mede também a compressão.
+app.add_middleware(MetricsMiddleware)
+instrument_engine(engine)
+instrument_engine(async_engine)
+for read_engine in read_engines:
+    instrument_engine(read_engine)
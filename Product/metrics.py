@@ -0,0 +1,189 @@
+import os
+import random
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+
+"""
+Métricas do Product.main:app, expostas no formato texto do Prometheus pela rota /metrics.
+
+- MetricsMiddleware mede a latência de cada requisição e guarda histogramas por rota (o caminho
+  declarado, ex: /api/v1/products/getProduct/{product_id}, e não a URL com o ID).
+- instrument_engine registra eventos do SQLAlchemy que contam as consultas SQL e o tempo gasto no banco
+  em cada requisição. Uma rota com problema N+1 aparece com muitas consultas por requisição.
+- Com SERVER_TIMING_SAMPLE_RATE > 0, essa fração das respostas recebe o cabeçalho Server-Timing com o
+  tempo de banco, serialização e autenticação, visível nas ferramentas de desenvolvedor do navegador.
+"""
+
+SERVER_TIMING_SAMPLE_RATE = float(os.getenv("SERVER_TIMING_SAMPLE_RATE", "0"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestStats:
+    """Classe com os tempos acumulados de uma requisição (guardada numa ContextVar)."""
+
+    __slots__ = ("db_statements", "db_time", "timings")
+
+    def __init__(self):
+        self.db_statements = 0
+        self.db_time = 0.0
+        self.timings = {}  # nome (ex: "auth", "serialize") -> segundos
+
+
+_current = ContextVar("request_stats", default=None)
+
+
+@contextmanager
+def timed(name: str):
+    """Função que mede o tempo de um trecho e soma nas estatísticas da requisição atual.
+
+    Example:
+        with timed("serialize"):
+            body = ...
+    """
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.timings[name] = stats.timings.get(name, 0.0) + time.perf_counter() - start
+
+
+class Histogram:
+    """Classe de histograma no formato do Prometheus (contagem acumulada por faixa, soma e total)."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+
+    def render(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Classe que guarda as métricas por rota e gera o texto do /metrics."""
+
+    def __init__(self):
+        self.latency = {}  # (método, rota) -> Histogram
+        self.db_statements = {}  # (método, rota) -> Histogram
+        self.db_time = {}  # (método, rota) -> Histogram
+        self.requests = {}  # (método, rota, status) -> total
+        self.collectors = []  # funções extras que retornam linhas de métricas
+
+    def observe(self, method: str, route: str, status: int, duration: float, stats: RequestStats):
+        key = (method, route)
+        if key not in self.latency:
+            self.latency[key] = Histogram(LATENCY_BUCKETS)
+            self.db_statements[key] = Histogram(STATEMENT_BUCKETS)
+            self.db_time[key] = Histogram(LATENCY_BUCKETS)
+        self.latency[key].observe(duration)
+        self.db_statements[key].observe(stats.db_statements)
+        self.db_time[key].observe(stats.db_time)
+        self.requests[(method, route, status)] = self.requests.get((method, route, status), 0) + 1
+
+    def render(self) -> str:
+        lines = []
+        for name, kind, help_text, series in (
+            ("http_request_duration_seconds", "histogram", "Latência das requisições", self.latency),
+            ("http_request_db_statements", "histogram", "Consultas SQL por requisição", self.db_statements),
+            ("http_request_db_seconds", "histogram", "Tempo no banco de dados por requisição", self.db_time),
+        ):
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for (method, route), histogram in sorted(series.items()):
+                lines += histogram.render(name, f'method="{method}",route="{route}"')
+
+        lines += ["# HELP http_requests_total Total de requisições", "# TYPE http_requests_total counter"]
+        for (method, route, status), total in sorted(self.requests.items()):
+            lines.append(f'http_requests_total{{method="{method}",route="{route}",status="{status}"}} {total}')
+
+        for collector in self.collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def instrument_engine(engine):
+    """Função que registra os eventos que contam consultas e tempo de banco na requisição atual.
+
+    Args:
+        engine (Engine | AsyncEngine): Engine do SQLAlchemy
+    """
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _current.get()
+        if stats is not None:
+            stats.db_statements += 1
+            stats.db_time += elapsed
+
+
+class MetricsMiddleware:
+    """Middleware ASGI que mede cada requisição HTTP e, por amostragem, adiciona o Server-Timing."""
+
+    def __init__(self, app, sample_rate: float = SERVER_TIMING_SAMPLE_RATE):
+        self.app = app
+        self.sample_rate = sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+        sampled = self.sample_rate > 0 and random.random() < self.sample_rate
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if sampled:
+                    entries = [f"db;dur={stats.db_time * 1000:.2f};desc=\"{stats.db_statements} consultas\""]
+                    entries += [f"{name};dur={seconds * 1000:.2f}" for name, seconds in stats.timings.items()]
+                    entries.append(f"total;dur={(time.perf_counter() - start) * 1000:.2f}")
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"server-timing", ", ".join(entries).encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # O caminho declarado da rota só existe depois do roteamento; sem rota (404) usa um nome fixo.
+            route = scope.get("route")
+            registry.observe(scope["method"], route.path if route else "<sem rota>", status_code,
+                             time.perf_counter() - start, stats)
+            _current.reset(token)
@@ -0,0 +1,113 @@
+import argparse
+import time
+from sqlalchemy import inspect, text
+from . import models
+from .search import setup_full_text_search, narrow_full_text_search_update_trigger
+from .seller_stats import setup_seller_stats, split_seller_stats_update_trigger
+
+"""
+Migrações versionadas do banco de dados do Product.main:app.
+
+Antes, o main.py chamava create_all ao ser importado, então cada processo abria o banco e inspecionava as
+tabelas antes de poder atender. Agora o esquema é gerenciado aqui: a tabela schema_version guarda a versão
+atual e cada migração da lista MIGRATIONS roda uma única vez, em ordem.
+
+Para aplicar as migrações manualmente (ex: no deploy, antes de subir os workers):
+    python -m Product.migrations
+
+Ao subir, a aplicação confere a versão (uma consulta) e só aplica o que faltar, a menos que
+AUTO_MIGRATE=false, quando ela nem toca no esquema.
+
+As migrações devem ser idempotentes: num banco novo a primeira (create_all) já cria o esquema atual
+completo, e as seguintes apenas conferem que a mudança já existe.
+"""
+
+
+def _create_tables(connection):
+    models.Base.metadata.create_all(bind=connection)
+    # O create_all não cria índices novos em tabelas que já existem, então eles são criados aqui.
+    for index in models.Product.__table__.indexes:
+        index.create(bind=connection, checkfirst=True)
+
+
+def _add_product_version(connection):
+    # Num banco novo a coluna já foi criada pelo create_all da migração 1.
+    columns = {column["name"] for column in inspect(connection).get_columns("products")}
+    if "version" not in columns:
+        connection.execute(text("ALTER TABLE products ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+# (versão, descrição, função que recebe a conexão, dentro de uma transação)
+MIGRATIONS = [
+    (1, "tabelas de produtos e vendedores, com índices", _create_tables),
+    (2, "busca textual FTS5 dos produtos", setup_full_text_search),
+    (3, "versão dos produtos (concorrência otimista)", _add_product_version),
+    (4, "trigger da busca textual só em alterações de nome e descrição", narrow_full_text_search_update_trigger),
+    (5, "agregados de produtos por vendedor (seller_stats)", setup_seller_stats),
+    (6, "guarda de seller_id NULL no trigger de UPDATE da seller_stats", split_seller_stats_update_trigger),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def current_version(connection) -> int:
+    """Função que retorna a versão atual do esquema (0 se o banco ainda não tiver sido migrado)."""
+    if not inspect(connection).has_table("schema_version"):
+        return 0
+    return connection.execute(text("SELECT MAX(version) FROM schema_version")).scalar() or 0
+
+
+def migrate(engine) -> list:
+    """Função que aplica as migrações que faltam, em ordem, cada uma na sua transação.
+
+    Args:
+        engine (Engine): Engine síncrono do banco de dados
+
+    Returns:
+        list: Versões aplicadas nesta chamada
+    """
+    applied = []
+    with engine.connect() as connection:
+        if current_version(connection) >= LATEST_VERSION:
+            return applied
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE IF NOT EXISTS schema_version "
+                                "(version INTEGER PRIMARY KEY, description VARCHAR, applied_at FLOAT)"))
+
+    for version, description, apply in MIGRATIONS:
+        with engine.begin() as connection:
+            # Conferido de novo dentro da transação, caso outro processo tenha migrado ao mesmo tempo.
+            if current_version(connection) >= version:
+                continue
+            apply(connection)
+            connection.execute(text("INSERT INTO schema_version (version, description, applied_at) "
+                                    "VALUES (:version, :description, :applied_at)"),
+                               {"version": version, "description": description, "applied_at": time.time()})
+            applied.append(version)
+    return applied
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aplica as migrações do banco de dados do Product.main:app.")
+    parser.add_argument("--status", action="store_true", help="Só mostra a versão atual do esquema")
+    args = parser.parse_args()
+
+    from .database import engine, SQLARCH_DATABASE_URL
+
+    if args.status:
+        with engine.connect() as connection:
+            print(f"{SQLARCH_DATABASE_URL}: versão {current_version(connection)} de {LATEST_VERSION}")
+        return
+
+    applied = migrate(engine)
+    if applied:
+        for version, description, _ in MIGRATIONS:
+            if version in applied:
+                print(f"Aplicada a migração {version}: {description}")
+    else:
+        print("O esquema já está na versão mais recente.")
+
+
+if __name__ == "__main__":
+    main()
@@ -10,11 +10,17 @@ class Product(Base):
     __tablename__ = 'products'
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String)
-    price = Column(Float, nullable=False)
+    # Os índices em name, price e seller_id atendem os filtros e a ordenação da rota de busca.
+    name = Column(String, index=True)
+    price = Column(Float, nullable=False, index=True)
     description = Column(String, nullable=True)
-    seller_id = Column(Integer, ForeignKey('sellers.id'))  # Relacionamento com a tabela de vendedores 
+    seller_id = Column(Integer, ForeignKey('sellers.id'), index=True)  # Relacionamento com a tabela de vendedores 
     seller = relationship("Seller", back_populates="products")  # Define o relacionamento com Seller
+    # Versão do produto, incrementada a cada alteração (controle de concorrência otimista). Com o
+    # version_id_col, o ORM faz o UPDATE com "WHERE version = <versão lida>" e incrementa a versão.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": version}
 
 # assim que você salva models.py com uma nova classe, lá no banco de dados é criado uma nova tabela.
 class Seller(Base):
@@ -24,4 +30,14 @@ class Seller(Base):
     username = Column(String, unique=True, nullable=False)
     email = Column(String, unique=True, nullable=False)
     password = Column(String, nullable=False)  # Senha deve ser armazenada de forma segura
-    products = relationship("Product", back_populates="seller")  # Define o relacionamento com Product
\ No newline at end of file
+    products = relationship("Product", back_populates="seller")  # Define o relacionamento com Product
+
+# Agregados pré-calculados dos produtos de cada vendedor, mantidos pelos triggers de seller_stats.py.
+class SellerStats(Base):
+    __tablename__ = 'seller_stats'
+
+    seller_id = Column(Integer, ForeignKey('sellers.id'), primary_key=True)
+    product_count = Column(Integer, nullable=False, default=0)
+    price_sum = Column(Float, nullable=False, default=0.0)  # valor total do catálogo do vendedor
+    min_price = Column(Float, nullable=True)  # None quando o vendedor não tem produtos
+    max_price = Column(Float, nullable=True)
\ No newline at end of file
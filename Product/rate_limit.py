@@ -0,0 +1,271 @@
+import math
+import os
+import time
+from collections import OrderedDict
+from typing import NamedTuple
+from fastapi import HTTPException, Request, status
+from . import response_cache
+
+"""
+Limite de requisições (rate limiting) por IP e por usuário, usado principalmente no /login: sem limite,
+qualquer um pode repetir tentativas sem parar, e cada uma faz uma consulta ao banco e possivelmente uma
+verificação completa do bcrypt, que é cara para a CPU.
+
+O algoritmo é o token bucket: cada chave (ex: "login:ip:10.0.0.1") tem um balde com até `limit` fichas,
+que é reabastecido continuamente a `limit / period` fichas por segundo, e cada requisição gasta uma ficha.
+Como o reabastecimento é contínuo, a janela é deslizante: em qualquer intervalo de `period` segundos
+passam no máximo `limit` requisições além das fichas acumuladas, sem a rajada dobrada que as janelas fixas
+permitem na virada da janela. Um balde cheio equivale a uma chave nunca vista, então ele não é guardado.
+
+As verificações são dependências do FastAPI que rodam antes da rota, então a recusa (429 com Retry-After)
+acontece antes de qualquer consulta ao banco ou hash de senha.
+
+Backends (RATE_LIMIT_BACKEND):
+- "memory" (padrão): dentro do processo, O(1) por verificação, com remoção periódica das chaves paradas;
+  com vários workers cada um tem os seus baldes, então o limite efetivo é multiplicado pelos workers;
+- "redis": compartilhado entre processos/servidores, com um script Lua atômico (precisa do pacote redis e
+  de REDIS_URL);
+- "fake": mesma interface do redis, em memória, para testes;
+- "none": desliga o limite.
+"""
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))  # chaves guardadas (backend memory)
+RATE_LIMIT_SWEEP_INTERVAL = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", "60"))  # segundos
+
+
+class Rate(NamedTuple):
+    """Classe que descreve um limite: `limit` requisições a cada `period` segundos."""
+
+    limit: int
+    period: float
+
+    @property
+    def per_second(self) -> float:
+        return self.limit / self.period
+
+    @classmethod
+    def parse(cls, value: str) -> "Rate":
+        """Função que lê um limite no formato "requisições/segundos".
+
+        Example:
+            Rate.parse("5/300")  # 5 requisições a cada 5 minutos
+        """
+        limit, _, period = value.partition("/")
+        return cls(int(limit), float(period or 1))
+
+
+def take_tokens(tokens: float, updated: float, now: float, rate: Rate, cost: int = 1):
+    """Função que reabastece o balde até agora e tenta gastar `cost` fichas.
+
+    Com cost=0 o balde só é conferido (precisa de ao menos uma ficha), sem gastar nada.
+
+    Args:
+        tokens (float): Fichas no balde na última atualização
+        updated (float): Data da última atualização
+        now (float): Data atual
+        rate (Rate): Limite do balde
+        cost (int, optional): Fichas gastas. Defaults to 1.
+
+    Returns:
+        tuple: (fichas depois da operação, segundos até poder tentar de novo, 0 se permitido)
+    """
+    tokens = min(rate.limit, tokens + max(0.0, now - updated) * rate.per_second)
+    needed = max(cost, 1)
+    if tokens < needed:
+        return tokens, (needed - tokens) / rate.per_second
+    return tokens - cost, 0.0
+
+
+class MemoryBackend:
+    """Classe de baldes em memória, limitada por quantidade de chaves (LRU).
+
+    Cada verificação é O(1). A cada `sweep_interval` segundos, as chaves cujo balde já encheu de novo são
+    removidas; como uma chave parada enche em no máximo `period` segundos, cada uma passa por um número
+    limitado de varreduras e o custo amortizado continua O(1).
+
+    Args:
+        max_keys (int): Quantidade máxima de chaves guardadas
+        sweep_interval (float): Intervalo, em segundos, entre as remoções das chaves paradas
+    """
+
+    def __init__(self, max_keys: int = RATE_LIMIT_MAX_KEYS, sweep_interval: float = RATE_LIMIT_SWEEP_INTERVAL):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self._buckets = OrderedDict()  # chave -> (fichas, atualizado em, balde cheio em)
+        self._next_sweep = time.monotonic() + sweep_interval
+
+    def __len__(self):
+        return len(self._buckets)
+
+    async def take(self, key: str, rate: Rate, cost: int = 1) -> float:
+        now = time.monotonic()
+        bucket = self._buckets.pop(key, None)
+        tokens, updated = (bucket[0], bucket[1]) if bucket is not None else (rate.limit, now)
+        tokens, retry_after = take_tokens(tokens, updated, now, rate, cost)
+        if tokens < rate.limit:
+            # Reinserida no fim: a ordem do OrderedDict é a do último uso (LRU).
+            self._buckets[key] = (tokens, now, now + (rate.limit - tokens) / rate.per_second)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        if now >= self._next_sweep:
+            self.sweep(now)
+        return retry_after
+
+    def sweep(self, now: float = None):
+        """Função que remove as chaves cujo balde já encheu (equivalentes a chaves nunca vistas)."""
+        now = time.monotonic() if now is None else now
+        for key in [key for key, bucket in self._buckets.items() if bucket[2] <= now]:
+            del self._buckets[key]
+        self._next_sweep = now + self.sweep_interval
+
+
+# Mesmo algoritmo do take_tokens, executado de forma atômica no redis. Os baldes cheios são apagados e os
+# demais expiram sozinhos quando enchem de novo (PEXPIRE), então o redis não acumula chaves paradas.
+# A resposta é texto porque o redis converte os números do Lua em inteiros.
+TOKEN_BUCKET_SCRIPT = """
+local limit = tonumber(ARGV[1])
+local per_second = limit / tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local now = tonumber(ARGV[4])
+local bucket = redis.call("HMGET", KEYS[1], "tokens", "updated")
+local tokens = tonumber(bucket[1]) or limit
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(limit, tokens + math.max(0, now - updated) * per_second)
+local needed = math.max(cost, 1)
+if tokens < needed then
+    return tostring((needed - tokens) / per_second)
+end
+tokens = tokens - cost
+if tokens >= limit then
+    redis.call("DEL", KEYS[1])
+else
+    redis.call("HSET", KEYS[1], "tokens", tokens, "updated", now)
+    redis.call("PEXPIRE", KEYS[1], math.ceil((limit - tokens) / per_second * 1000))
+end
+return "0"
+"""
+
+
+class RedisBackend:
+    """Classe de baldes compartilhados usando um cliente redis.asyncio (ou o FakeRedis nos testes).
+
+    A data vem do relógio de cada servidor (time.time()), então os relógios precisam estar sincronizados.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self._script = client.register_script(TOKEN_BUCKET_SCRIPT)
+
+    async def take(self, key: str, rate: Rate, cost: int = 1) -> float:
+        return float(await self._script(keys=[key], args=[rate.limit, rate.period, cost, time.time()]))
+
+
+class FakeRedis(response_cache.FakeRedis):
+    """Classe que imita o redis.asyncio para o RedisBackend, guardando tudo em memória.
+
+    O Lua não é interpretado: o register_script só aceita o TOKEN_BUCKET_SCRIPT, que é executado pela
+    função equivalente em Python (take_tokens).
+    """
+
+    def register_script(self, script: str):
+        if script != TOKEN_BUCKET_SCRIPT:
+            raise NotImplementedError("O FakeRedis só executa o TOKEN_BUCKET_SCRIPT")
+        return self._token_bucket
+
+    async def _token_bucket(self, keys, args):
+        limit, period, cost, now = int(args[0]), float(args[1]), int(args[2]), float(args[3])
+        rate = Rate(limit, period)
+        value = await self.get(keys[0])
+        tokens, updated = map(float, value.split()) if value is not None else (limit, now)
+        tokens, retry_after = take_tokens(tokens, updated, now, rate, cost)
+        if retry_after:
+            return str(retry_after).encode()
+        if tokens >= limit:
+            await self.delete(keys[0])
+        else:
+            await self.set(keys[0], f"{tokens} {now}", ex=max(1, math.ceil((limit - tokens) / rate.per_second)))
+        return b"0"
+
+
+class RateLimiter:
+    """Classe que aplica os limites sobre um backend e conta as recusas.
+
+    Args:
+        backend: MemoryBackend, RedisBackend ou None para desligar o limite
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.rejected = 0
+
+    async def check(self, *rules):
+        """Função que confere (e gasta) as fichas de cada regra, recusando a requisição na primeira sem fichas.
+
+        Args:
+            *rules (tuple): (chave, Rate, fichas gastas); com 0 fichas a regra só é conferida
+
+        Raises:
+            HTTPException: 429 com o cabeçalho Retry-After quando algum balde está vazio
+        """
+        if self.backend is None:
+            return
+        for key, rate, cost in rules:
+            retry_after = await self.backend.take("ratelimit:" + key, rate, cost)
+            if retry_after:
+                self.rejected += 1
+                raise HTTPException(status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                                    detail="Muitas tentativas. Tente novamente mais tarde.",
+                                    headers={"Retry-After": str(math.ceil(retry_after))})
+
+    async def consume(self, key: str, rate: Rate, cost: int = 1):
+        """Função que gasta fichas sem recusar nada (ex: registrar uma senha errada depois de verificada)."""
+        if self.backend is not None:
+            await self.backend.take("ratelimit:" + key, rate, cost)
+
+
+def client_ip(request: Request) -> str:
+    """Função que retorna o IP do cliente.
+
+    Atrás de um proxy, rode o uvicorn com --proxy-headers (e --forwarded-allow-ips) para que o IP venha do
+    X-Forwarded-For em vez do IP do proxy.
+    """
+    return request.client.host if request.client else "desconhecido"
+
+
+def limit_per_ip(scope: str, rate: Rate):
+    """Função que cria uma dependência que limita as requisições de cada IP a uma rota.
+
+    Args:
+        scope (str): Nome do limite, parte da chave (ex: "signup")
+        rate (Rate): Limite de requisições por IP
+
+    Returns:
+        callable: Dependência para usar em dependencies=[Depends(...)]
+
+    Example:
+        @router.post("/addNewSeller", dependencies=[Depends(limit_per_ip("signup", SIGNUP_RATE_PER_IP))])
+    """
+    async def dependency(request: Request):
+        await rate_limiter.check((f"{scope}:ip:{client_ip(request)}", rate, 1))
+    return dependency
+
+
+def _create_backend(name: str):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        import redis.asyncio  # dependência opcional, só necessária com RATE_LIMIT_BACKEND=redis
+        return RedisBackend(redis.asyncio.from_url(response_cache.REDIS_URL))
+    if name == "fake":
+        return RedisBackend(FakeRedis())
+    return None
+
+
+# Limites das rotas de autenticação, no formato "requisições/segundos".
+LOGIN_RATE_PER_IP = Rate.parse(os.getenv("LOGIN_RATE_PER_IP", "20/60"))
+LOGIN_FAILURES_PER_USERNAME = Rate.parse(os.getenv("LOGIN_FAILURES_PER_USERNAME", "5/300"))
+SIGNUP_RATE_PER_IP = Rate.parse(os.getenv("SIGNUP_RATE_PER_IP", "10/60"))
+
+# Instância única compartilhada pelas rotas.
+rate_limiter = RateLimiter(_create_backend(RATE_LIMIT_BACKEND))
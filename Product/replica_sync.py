@@ -0,0 +1,58 @@
+import argparse
+import sqlite3
+import sys
+import time
+from contextlib import closing
+
+"""
+Réplicas de leitura locais com SQLite, para testar o roteamento de leituras (SQLARCH_READ_REPLICA_URLS)
+sem um banco com replicação de verdade.
+
+O SQLite não replica sozinho, então este módulo copia o arquivo primário para os arquivos das réplicas com
+a API de backup do SQLite, que é segura com a aplicação usando os dois bancos ao mesmo tempo. Com
+--interval, a cópia se repete, o que imita uma réplica assíncrona com até `interval` segundos de atraso.
+
+Uso:
+    SQLARCH_READ_REPLICA_URLS=sqlite:///./replica1.db,sqlite:///./replica2.db uvicorn Product.main:app
+    python -m Product.replica_sync product.db replica1.db replica2.db --interval 1
+"""
+
+
+def sync_sqlite_replica(primary: str, replica: str):
+    """Função que copia o banco SQLite primário para a réplica.
+
+    A réplica fica igual ao primário no momento da cópia (esquema e dados). Quem estiver lendo a réplica
+    durante a cópia continua vendo a versão anterior até o fim da sua transação.
+
+    Args:
+        primary (str): Caminho do arquivo do banco primário
+        replica (str): Caminho do arquivo da réplica (criado se não existir)
+
+    Example:
+        sync_sqlite_replica("product.db", "replica1.db")
+    """
+    with closing(sqlite3.connect(primary)) as source, closing(sqlite3.connect(replica)) as target:
+        source.backup(target)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("primary", help="Arquivo do banco primário")
+    parser.add_argument("replicas", nargs="+", help="Arquivos das réplicas")
+    parser.add_argument("--interval", type=float, default=0,
+                        help="Repete a cópia a cada N segundos (0 = copia uma vez e sai)")
+    args = parser.parse_args()
+
+    while True:
+        start = time.perf_counter()
+        for replica in args.replicas:
+            sync_sqlite_replica(args.primary, replica)
+        print(f"[replica_sync] {len(args.replicas)} réplica(s) sincronizada(s) em "
+              f"{(time.perf_counter() - start) * 1000:.1f} ms", file=sys.stderr)
+        if not args.interval:
+            return
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
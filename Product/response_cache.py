@@ -0,0 +1,260 @@
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from fastapi import Request, Response, status
+from .http_cache import last_modified_headers
+
+"""
+Cache das respostas de leitura de produtos. O catálogo é lido muito mais do que é alterado, então o corpo
+JSON já serializado fica guardado (chave = rota + parâmetros) e as próximas leituras não tocam no banco
+nem no Pydantic. As rotas de escrita invalidam as entradas afetadas. Cada resposta tem um ETag, e o cliente
+que mandar If-None-Match com o mesmo valor recebe 304 sem corpo.
+
+Backends:
+- "memory" (padrão): LRU com TTL dentro do processo; com vários workers cada um tem o seu cache e a sua
+  geração, então uma escrita num worker só chega às listas guardadas nos outros depois do TTL, e o
+  Last-Modified / If-Modified-Since (que não tem TTL) é desligado;
+- "redis": compartilhado entre processos/servidores (precisa do pacote redis e de REDIS_URL);
+- "fake": mesma interface do redis, em memória, para testes;
+- "none": desliga o cache.
+"""
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL = int(os.getenv("RESPONSE_CACHE_TTL", "60"))  # segundos
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))  # entradas (backend memory)
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+# Processos que atendem a aplicação: o Product.serve exporta SERVE_WORKERS; com o "uvicorn --workers",
+# informe WEB_CONCURRENCY (ou SERVE_WORKERS).
+RESPONSE_CACHE_WORKERS = int(os.getenv("SERVE_WORKERS") or os.getenv("WEB_CONCURRENCY") or "1")
+
+
+class MemoryBackend:
+    """Classe de cache em memória, limitada por quantidade de entradas (LRU) e por tempo de vida (TTL).
+
+    Valores gravados sem TTL (a geração e a data da última alteração) ficam fora do LRU: se fossem
+    removidos para abrir espaço, a geração voltaria a um número já usado e a data mudaria.
+    """
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # chave -> (valor, expira em)
+        self._persistent = {}  # chave -> valor, sem TTL e fora do LRU
+
+    async def get(self, key: str):
+        if key in self._persistent:
+            return self._persistent[key]
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[1] <= time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    async def set(self, key: str, value: bytes, ttl: int = None):
+        if ttl is None:
+            self._persistent[key] = value
+            return
+        self._entries[key] = (value, time.monotonic() + ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def delete(self, key: str):
+        self._entries.pop(key, None)
+        self._persistent.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int((await self.get(key)) or 0) + 1
+        # O contador de geração não expira.
+        await self.set(key, str(value).encode())
+        return value
+
+
+class RedisBackend:
+    """Classe de cache compartilhado usando um cliente redis.asyncio (ou o FakeRedis nos testes)."""
+
+    def __init__(self, client):
+        self.client = client
+
+    async def get(self, key: str):
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int = None):
+        await self.client.set(key, value, ex=ttl)
+
+    async def delete(self, key: str):
+        await self.client.delete(key)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+
+class FakeRedis:
+    """Classe que imita os comandos do redis.asyncio usados pelo RedisBackend, guardando tudo em memória."""
+
+    def __init__(self):
+        self._data = {}  # chave -> (valor, expira em ou None)
+
+    async def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None or (entry[1] is not None and entry[1] <= time.monotonic()):
+            self._data.pop(key, None)
+            return None
+        return entry[0]
+
+    async def set(self, key: str, value, ex: int = None):
+        self._data[key] = (value if isinstance(value, bytes) else str(value).encode(),
+                           time.monotonic() + ex if ex else None)
+
+    async def delete(self, *keys: str):
+        for key in keys:
+            self._data.pop(key, None)
+
+    async def incr(self, key: str) -> int:
+        value = int((await self.get(key)) or 0) + 1
+        self._data[key] = (str(value).encode(), None)
+        return value
+
+
+def _encode(body: bytes, headers: dict) -> bytes:
+    # Os cabeçalhos (ETag, cursor da próxima página...) vão numa primeira linha JSON, seguida do corpo.
+    return json.dumps(headers).encode() + b"\n" + body
+
+
+def _decode(value: bytes):
+    headers, body = value.split(b"\n", 1)
+    return body, json.loads(headers)
+
+
+class ResponseCache:
+    """Classe que guarda as respostas serializadas das rotas de leitura de produtos.
+
+    As listas de produtos dependem de todos os produtos, então em vez de apagar cada lista guardada,
+    as chaves das listas incluem um número de geração: qualquer escrita incrementa a geração e as
+    listas antigas deixam de ser encontradas (e expiram pelo TTL). Junto com a geração fica a data da
+    última alteração do catálogo, usada no Last-Modified / If-Modified-Since das listas.
+
+    O 304 por data não tem TTL: um worker que não soubesse de uma alteração feita em outro responderia 304
+    para sempre. Por isso, com o backend memory e mais de um worker, o Last-Modified é desligado
+    (last_modified() retorna None) e só o ETag continua valendo.
+
+    Args:
+        backend: MemoryBackend, RedisBackend ou None para desligar o cache
+        ttl (int): Tempo de vida das entradas, em segundos
+        workers (int): Quantidade de processos que atendem a aplicação
+    """
+
+    GENERATION_KEY = "products:generation"
+    MODIFIED_KEY = "products:modified_at"
+
+    def __init__(self, backend, ttl: int = RESPONSE_CACHE_TTL, workers: int = RESPONSE_CACHE_WORKERS):
+        self.backend = backend
+        self.ttl = ttl
+        # A data só é a mesma em todos os workers com um backend compartilhado (redis).
+        self.conditional = backend is not None and (workers <= 1 or not isinstance(backend, MemoryBackend))
+
+    def product_key(self, product_id: int) -> str:
+        return f"products:item:{product_id}"
+
+    async def list_key(self, *params) -> str:
+        generation = int((await self.backend.get(self.GENERATION_KEY)) or 0) if self.backend else 0
+        return f"products:list:{generation}:" + ":".join(str(param) for param in params)
+
+    async def modified_at(self):
+        """Função que retorna a data (time.time()) da última alteração do catálogo de produtos.
+
+        Sem registro (processo novo ou redis reiniciado), a data passa a ser agora: qualquer alteração
+        anterior fica com uma data menor, então nenhum cliente recebe 304 indevido. O registro não expira
+        nem sai do LRU.
+
+        Returns:
+            float: Data da última alteração, ou None com o cache desligado
+        """
+        if self.backend is None:
+            return None
+        value = await self.backend.get(self.MODIFIED_KEY)
+        if value is None:
+            value = str(time.time()).encode()
+            await self.backend.set(self.MODIFIED_KEY, value)
+        return float(value)
+
+    async def last_modified(self):
+        """Função que retorna a data para o Last-Modified / If-Modified-Since, ou None se ele está desligado."""
+        return await self.modified_at() if self.conditional else None
+
+    async def get(self, key: str):
+        """Função que busca uma resposta guardada.
+
+        Returns:
+            tuple: (corpo, cabeçalhos), ou None se não estiver no cache
+        """
+        if self.backend is None:
+            return None
+        value = await self.backend.get(key)
+        return _decode(value) if value is not None else None
+
+    async def set(self, key: str, body: bytes, headers: dict = None, store: bool = True) -> dict:
+        """Função que guarda uma resposta serializada, junto com o ETag calculado a partir do corpo.
+
+        Args:
+            store (bool, optional): Se False, só calcula o ETag, sem guardar a resposta. Defaults to True.
+
+        Returns:
+            dict: Cabeçalhos da resposta, incluindo o ETag
+        """
+        headers = {**(headers or {}), "ETag": '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'}
+        if self.backend is not None and store:
+            await self.backend.set(key, _encode(body, headers), self.ttl)
+        return headers
+
+    async def invalidate(self, product_id: int = None):
+        """Função que invalida as listas de produtos e, se informado, o produto alterado.
+
+        Args:
+            product_id (int, optional): ID do produto alterado ou removido. Defaults to None.
+        """
+        if self.backend is None:
+            return
+        if product_id is not None:
+            await self.backend.delete(self.product_key(product_id))
+        await self.backend.incr(self.GENERATION_KEY)
+        await self.backend.set(self.MODIFIED_KEY, str(time.time()).encode())
+
+
+def cached_response(request: Request, body: bytes, headers: dict, modified_at: float = None) -> Response:
+    """Função que monta a resposta JSON, ou 304 sem corpo se o cliente já tem a mesma versão (If-None-Match).
+
+    Args:
+        request (Request): Requisição atual
+        body (bytes): Corpo JSON já serializado
+        headers (dict): Cabeçalhos da resposta, incluindo o ETag
+        modified_at (float, optional): Data da última alteração, para o Last-Modified. Defaults to None.
+
+    Returns:
+        Response: Resposta 200 com o corpo ou 304 sem corpo
+    """
+    headers = {**headers, **last_modified_headers(modified_at)}
+    if_none_match = request.headers.get("if-none-match")
+    # Comparação fraca: a resposta comprimida leva o ETag como W/"...", que o cliente manda de volta.
+    if if_none_match and headers["ETag"] in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": headers["ETag"]})
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+def _create_backend(name: str):
+    if name == "memory":
+        return MemoryBackend()
+    if name == "redis":
+        import redis.asyncio  # dependência opcional, só necessária com RESPONSE_CACHE_BACKEND=redis
+        return RedisBackend(redis.asyncio.from_url(REDIS_URL))
+    if name == "fake":
+        return RedisBackend(FakeRedis())
+    return None
+
+
+# Instância única compartilhada pelas rotas.
+response_cache = ResponseCache(_create_backend(RESPONSE_CACHE_BACKEND))
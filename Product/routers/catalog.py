@@ -0,0 +1,130 @@
+import os
+import tempfile
+import time
+from fastapi import APIRouter, status, Request, HTTPException, Query, Path
+from fastapi.concurrency import run_in_threadpool
+from fastapi.params import Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy.exc import IntegrityError
+from .. import schemas
+from ..catalog_io import CATALOG_CHUNK_SIZE, FORMATS, export_table, import_table
+from ..database import engine
+from ..response_cache import response_cache
+from ..change_feed import product_changes
+from .login import get_current_user
+
+router = APIRouter(
+    tags=['Catalog'],
+    prefix="/api/v1/catalog"  # Prefixo para todas as rotas deste router
+)
+
+MAX_CHUNK_SIZE = 100000
+# O corpo da importação fica em memória até esse tamanho; acima dele vai para um arquivo temporário.
+IMPORT_SPOOL_SIZE = int(os.getenv("CATALOG_IMPORT_SPOOL_SIZE", str(16 * 1024 * 1024)))  # bytes
+
+TABLE_PATTERN = "^(products|sellers)$"
+FORMAT_PATTERN = "^(csv|ndjson|arrow)$"
+
+
+def require_admin(current_user: schemas.TokenData = Depends(get_current_user)):
+    """Função (dependência) que só deixa o administrador exportar e importar as tabelas."""
+    if current_user.username != "admin":
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN,
+                            detail="Acesso negado. Apenas administradores podem exportar e importar o catálogo.")
+    return current_user
+
+
+def _export_stream(table: str, fmt: str, chunk_size: int):
+    # Gerador síncrono: o Starlette chama cada next() numa thread, então a leitura do banco e a conversão
+    # não bloqueiam o event loop. A conexão é do gerador porque o streaming continua depois da rota.
+    with engine.connect() as connection:
+        yield from export_table(connection, table, fmt, chunk_size)
+
+
+def _import_file(table: str, fmt: str, file, chunk_size: int, keep_ids: bool) -> int:
+    with engine.begin() as connection:
+        return import_table(connection, table, fmt, file, chunk_size, keep_ids)
+
+
+@router.get("/export/{table}", response_class=StreamingResponse, dependencies=[Depends(require_admin)])
+def export_catalog(table: str = Path(..., pattern=TABLE_PATTERN),
+                   format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+                   chunk_size: int = Query(CATALOG_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE)):
+    """Função que exporta uma tabela inteira (products ou sellers) em CSV, NDJSON ou Arrow IPC.
+
+    As linhas são lidas do banco em blocos de chunk_size e enviadas assim que cada bloco é convertido,
+    então a memória usada não depende do tamanho da tabela.
+
+    Args:
+        table (str): "products" ou "sellers"
+        format (str, optional): "csv", "ndjson" ou "arrow". Defaults to "ndjson".
+        chunk_size (int, optional): Linhas lidas do banco por vez. Defaults to 5000.
+
+    Returns:
+        StreamingResponse: Arquivo exportado
+
+    Example:
+        /api/v1/catalog/export/products?format=csv
+    """
+    media_type, extension = FORMATS[format]
+    stream = _export_stream(table, format, chunk_size)
+    try:
+        # O primeiro pedaço é lido aqui para que um erro (ex: pyarrow não instalado) vire um 400, e não
+        # uma resposta 200 interrompida.
+        first = next(stream)
+    except ValueError as error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+
+    def body():
+        yield first
+        yield from stream
+
+    return StreamingResponse(body(), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{table}.{extension}"'})
+
+
+@router.post("/import/{table}", status_code=status.HTTP_201_CREATED, dependencies=[Depends(require_admin)])
+async def import_catalog(request: Request,
+                         table: str = Path(..., pattern=TABLE_PATTERN),
+                         format: str = Query("ndjson", pattern=FORMAT_PATTERN),
+                         chunk_size: int = Query(CATALOG_CHUNK_SIZE, ge=1, le=MAX_CHUNK_SIZE),
+                         keep_ids: bool = Query(True, description="Se False, o banco gera IDs novos")):
+    """Função que importa um arquivo CSV, NDJSON ou Arrow IPC (corpo da requisição) para uma tabela.
+
+    As linhas são gravadas em blocos de chunk_size, com um único INSERT (executemany) por bloco, numa
+    única transação: se alguma linha for recusada, nada é gravado. Importe os vendedores antes dos
+    produtos deles; um produto de um vendedor que não existe recusa a importação inteira. A exportação
+    não traz a senha dos vendedores, então a importação deles precisa de um arquivo com a coluna password.
+
+    Args:
+        table (str): "products" ou "sellers"
+        format (str, optional): "csv", "ndjson" ou "arrow". Defaults to "ndjson".
+        chunk_size (int, optional): Linhas por INSERT. Defaults to 5000.
+        keep_ids (bool, optional): Mantém os IDs do arquivo. Defaults to True.
+
+    Raises:
+        HTTPException: 400 para arquivos inválidos ou vendedores inexistentes e 409 se alguma linha violar
+            uma restrição do banco
+
+    Returns:
+        dict: Quantidade de linhas importadas e a vazão (linhas por segundo)
+    """
+    start = time.perf_counter()
+    with tempfile.SpooledTemporaryFile(max_size=IMPORT_SPOOL_SIZE) as spool:
+        async for data in request.stream():
+            spool.write(data)
+        spool.seek(0)
+        try:
+            rows = await run_in_threadpool(_import_file, table, format, spool, chunk_size, keep_ids)
+        except ValueError as error:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(error))
+        except IntegrityError as error:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                                detail=f"Importação desfeita: {error.orig}")
+    elapsed = time.perf_counter() - start
+
+    if table == "products" and rows:
+        await response_cache.invalidate()
+        product_changes.publish("bulk_create", {"inserted": rows})
+    return {"message": "Importação concluída", "table": table, "inserted": rows,
+            "rows_per_second": round(rows / elapsed, 1) if elapsed else None}
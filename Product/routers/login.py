@@ -1,10 +1,14 @@
-from fastapi import APIRouter, status, Response, HTTPException
+from fastapi import APIRouter, status, HTTPException, Request
 from fastapi.params import Depends
-from sqlalchemy.orm import Session
-from .. import schemas, models # .. volta um diretório na hierarquia de pacotes
-from ..database import get_db # .. volta um diretório na hierarquia de pacotes
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models # .. volta um diretório na hierarquia de pacotes
+from ..database import get_async_db # .. volta um diretório na hierarquia de pacotes
 from ..schemas import TokenData
-from passlib.context import CryptContext # serve para transformar senhas em hash.
+from ..hashing import password_hasher
+from ..token_cache import token_cache
+from ..rate_limit import rate_limiter, client_ip, LOGIN_RATE_PER_IP, LOGIN_FAILURES_PER_USERNAME
+from ..metrics import timed
 from datetime import datetime, timedelta
 from jose import jwt  # biblioteca para manipulação de JWT (JSON Web Tokens)
 from fastapi.security import OAuth2PasswordBearer
@@ -16,12 +20,6 @@ ACCESS_TOKEN_EXPIRE_MINUTES = 20
 
 router = APIRouter()
 
-# Contexto de criptografia para senhas, usando bcrypt como algoritmo de hash.
-# O bcrypt é um algoritmo de hash seguro e amplamente utilizado para armazenar senhas.
-# O bcrypt a ser instalado deve ser a versão 4.0.1 para não dar o warning
-# AttributeError: module 'bcrypt' has no attribute '__about__'
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto") 
-
 # OAuth2PasswordBearer é uma classe do FastAPI que implementa o fluxo de autenticação OAuth2 com senha.
 # Ela é usada para extrair o token de autenticação do cabeçalho Authorization da solicitação HTTP.
 # Serve para verificar se o usuário está autenticado antes de acessar rotas protegidas.
@@ -42,17 +40,47 @@ def generate_token(data: dict):
 
     return token
 
-@router.post("/login", status_code=status.HTTP_200_OK)
-def login(request: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+
+async def throttle_login(raw_request: Request, request: OAuth2PasswordRequestForm = Depends()):
+    """
+    Função (dependência) que limita as tentativas de login: por IP, todas as tentativas, e por usuário,
+    as senhas erradas. Roda antes da rota, então a tentativa recusada (429) não consulta o banco nem
+    verifica a senha com o bcrypt.
+    """
+    await rate_limiter.check(
+        (f"login:ip:{client_ip(raw_request)}", LOGIN_RATE_PER_IP, 1),
+        # Só confere se ainda há fichas; elas são gastas pela rota quando a senha está errada.
+        (f"login:failures:{request.username}", LOGIN_FAILURES_PER_USERNAME, 0),
+    )
+
+
+async def _login_failed(username: str, status_code: int):
+    await rate_limiter.consume(f"login:failures:{username}", LOGIN_FAILURES_PER_USERNAME)
+    raise HTTPException(status_code=status_code, detail="Usuário ou Senha incorreta")
+
+
+# O OAuth2PasswordRequestForm é o mesmo objeto no throttle_login e na rota (o FastAPI reaproveita a
+# dependência), então o formulário é lido uma única vez.
+@router.post("/login", status_code=status.HTTP_200_OK, dependencies=[Depends(throttle_login)])
+async def login(request: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
 
     # Verifica se o usuário existe no banco de dados
-    user = db.query(models.Seller).filter(models.Seller.username == request.username).first()
+    result = await db.execute(select(models.Seller).where(models.Seller.username == request.username))
+    user = result.scalars().first()
     if user is None:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Usuário ou Senha incorreta")
+        await _login_failed(request.username, status.HTTP_404_NOT_FOUND)
     
     # Verifica se a senha fornecida corresponde à senha armazenada no banco de dados
-    if not pwd_context.verify(request.password, user.password):
-        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Usuário ou Senha incorreta")
+    # O bcrypt é pesado para a CPU, então roda no pool de processos do password_hasher.
+    valid, new_hash = await password_hasher.verify_and_update(request.password, user.password)
+    if not valid:
+        await _login_failed(request.username, status.HTTP_401_UNAUTHORIZED)
+
+    # Se o hash armazenado usa um custo menor que o configurado (BCRYPT_ROUNDS), aproveita que
+    # temos a senha em mãos e salva o hash refeito com o custo atual.
+    if new_hash is not None:
+        user.password = new_hash
+        await db.commit()
     
     # Gerar topen JWT ou outro mecanismo de autenticação aqui, se necessário.
     token_data = {"username": user.username}
@@ -66,6 +94,20 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
     """
     Função para obter o usuário atual a partir do token JWT.
     """
+    with timed("auth"):
+        return _verify_token(token)
+
+
+def _verify_token(token: str):
+    # Token revogado (logout) é recusado antes de qualquer outra verificação.
+    revoked, cached = token_cache.lookup(token)
+    if revoked:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
+
+    # Se o token já foi verificado antes e ainda não expirou, evita verificar a assinatura de novo.
+    if cached is not None:
+        return cached
+
     try:
         # Decodifica o token JWT usando o SECRET_KEY e o ALGORITHM definidos. Ou seja vai decodificar
         # o token para extrair as informações de usuário logado.
@@ -75,8 +117,19 @@ def get_current_user(token: str = Depends(oauth2_scheme)):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
         
         token_data = TokenData(username=username)
+        token_cache.put(token, token_data, payload["exp"])
         
         return token_data
     except jwt.JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Token inválido")
 
+
+@router.post("/logout", status_code=status.HTTP_200_OK)
+def logout(token: str = Depends(oauth2_scheme), current_user: TokenData = Depends(get_current_user)):
+    """
+    Função que revoga o token atual. Até expirar, ele é recusado pelo get_current_user.
+    """
+    # O token já foi verificado pelo get_current_user, então basta ler o "exp" sem verificar de novo.
+    token_cache.revoke(token, jwt.get_unverified_claims(token)["exp"])
+    return {"message": "Logout realizado com sucesso"}
+
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Response
+from ..metrics import registry
+from ..token_cache import token_cache
+from ..hashing import password_hasher
+from ..http_cache import compressed_variants
+from ..rate_limit import rate_limiter
+from ..change_feed import product_changes
+
+router = APIRouter(
+    tags=['Metrics']
+)
+
+
+def _cache_metrics():
+    """Função que exporta os contadores do cache de tokens, do pool de hash de senhas, das respostas comprimidas
+    e do limite de requisições, além dos clientes conectados ao feed de alterações."""
+    stats = token_cache.stats()
+    lines = [
+        "# TYPE token_cache_hits_total counter", f"token_cache_hits_total {stats['hits']}",
+        "# TYPE token_cache_misses_total counter", f"token_cache_misses_total {stats['misses']}",
+        "# TYPE token_cache_size gauge", f"token_cache_size {stats['size']}",
+        "# TYPE password_hasher_pending gauge", f"password_hasher_pending {password_hasher.pending}",
+        "# TYPE compressed_variants_hits_total counter", f"compressed_variants_hits_total {compressed_variants.hits}",
+        "# TYPE compressed_variants_misses_total counter",
+        f"compressed_variants_misses_total {compressed_variants.misses}",
+        "# TYPE compressed_variants_bytes gauge", f"compressed_variants_bytes {compressed_variants.size}",
+        "# TYPE rate_limit_rejected_total counter", f"rate_limit_rejected_total {rate_limiter.rejected}",
+        "# TYPE change_feed_subscribers gauge", f"change_feed_subscribers {product_changes.subscribers}",
+    ]
+    # Com a lista de revogados no redis, a quantidade não é conhecida pelo processo.
+    if stats["revoked"] is not None:
+        lines += ["# TYPE token_cache_revoked gauge", f"token_cache_revoked {stats['revoked']}"]
+    if hasattr(rate_limiter.backend, "__len__"):
+        # Só o backend memory sabe quantas chaves guarda.
+        lines += ["# TYPE rate_limit_keys gauge", f"rate_limit_keys {len(rate_limiter.backend)}"]
+    return lines
+
+
+registry.collectors.append(_cache_metrics)
+
+
+# Formato texto do Prometheus, lido pelo servidor do Prometheus a cada coleta.
+@router.get("/metrics")
+def metrics():
+    """Função que retorna as métricas da aplicação no formato do Prometheus.
+
+    Returns:
+        Response: Texto com latência por rota, consultas SQL e tempo de banco por requisição
+    """
+    return Response(content=registry.render(), media_type="text/plain; version=0.0.4")
@@ -1,25 +1,183 @@
-from fastapi import APIRouter, status, Response, HTTPException
-from fastapi.security.oauth2 import OAuth2PasswordRequestForm
+import time
+from fastapi import APIRouter, status, Request, Response, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from .login import get_current_user
 from fastapi.params import Depends
-from sqlalchemy.orm import Session
-from typing import List
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import select, delete, insert, update, or_, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from typing import List, Optional
 from .. import schemas, models # .. volta um diretório na hierarquia de pacotes
-from ..database import get_db # .. volta um diretório na hierarquia de pacotes
+from ..search import FTS_TABLE, fts_query, supports_full_text_search
+from ..response_cache import response_cache, cached_response
+from ..http_cache import is_not_modified, last_modified_headers
+from ..change_feed import product_changes
+from ..metrics import timed
+from ..serializers import FAST_JSON, product_rows_query, serialize_product_row, serialize_product_rows
+from ..database import get_async_db, get_read_db, AsyncSessionLocal, async_engine, READ_YOUR_WRITES_SECONDS # .. volta um diretório na hierarquia de pacotes
 
 router = APIRouter(
     tags=['Products'],
     prefix="/api/v1/products"  # Prefixo para todas as rotas deste router
 )
 
+# Limites da paginação por cursor (keyset) do listAllProducts.
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+# Quantidade de linhas lidas do banco a cada lote no modo de streaming NDJSON.
+STREAM_BATCH_SIZE = 1000
+# Quantidade de produtos gravados por transação na carga em lote.
+BULK_CHUNK_SIZE = 1000
+MAX_BULK_CHUNK_SIZE = 10000
+# Quantidade máxima de IDs numa consulta em lote do getProducts.
+MAX_BATCH_IDS = 100
 
+# Serializa a lista de produtos direto para bytes JSON, que é o que fica guardado no response_cache.
+_product_list_adapter = TypeAdapter(List[schemas.DisplayProduct])
 
-# Depends(get_db) é um mecanismo do FastAPI que permite injetar dependências em rotas.
+
+async def _products_page(db: AsyncSession, after: Optional[int], limit: int):
+    """Função que busca uma página de produtos usando paginação por cursor (keyset).
+
+    Em vez de OFFSET, filtra por ``Product.id > after``, o que usa o índice da chave primária
+    e mantém o custo constante independente da página. O vendedor é carregado na mesma
+    consulta (joinedload), evitando uma consulta extra por produto (problema N+1). O JOIN é interno,
+    como no caminho rápido (product_rows_query): um produto sem vendedor não aparece em nenhum dos dois,
+    em vez de quebrar a validação do DisplayProduct, que exige o vendedor.
+
+    Args:
+        db (AsyncSession): Sessão do banco de dados
+        after (int, optional): ID do último produto da página anterior
+        limit (int): Quantidade máxima de produtos na página
+
+    Returns:
+        list: Lista de produtos ordenados pelo ID
+    """
+    query = select(models.Product).options(joinedload(models.Product.seller, innerjoin=True))
+    if after is not None:
+        query = query.where(models.Product.id > after)
+    result = await db.execute(query.order_by(models.Product.id).limit(limit))
+    return result.scalars().all()
+
+
+async def _product_rows_page(db: AsyncSession, after: Optional[int], limit: int):
+    """Função igual à _products_page, mas que retorna tuplas só com as colunas da saída (caminho rápido).
+
+    Returns:
+        list: Tuplas (id, name, price, description, version, username, email) ordenadas pelo ID
+    """
+    query = product_rows_query()
+    if after is not None:
+        query = query.where(models.Product.id > after)
+    result = await db.execute(query.order_by(models.Product.id).limit(limit))
+    return result.all()
+
+
+async def _stream_products_ndjson(after: Optional[int], bind, batch_size: int = STREAM_BATCH_SIZE):
+    """Gerador que exporta todos os produtos em NDJSON (um JSON por linha) com memória constante.
+
+    Lê os produtos em lotes usando o mesmo cursor por ID e serializa cada linha assim que
+    ela é lida. A sessão é própria do gerador porque o streaming continua depois que a
+    rota retorna; ela usa o mesmo banco (réplica ou primário) escolhido para a rota.
+    """
+    async with AsyncSessionLocal(bind=bind) as db:
+        if FAST_JSON:
+            # Caminho rápido: as tuplas viram JSON direto, sem passar por objetos do ORM.
+            while rows := await _product_rows_page(db, after, batch_size):
+                for row in rows:
+                    yield serialize_product_row(row) + b"\n"
+                after = rows[-1].id
+            return
+
+        while True:
+            products = await _products_page(db, after, batch_size)
+            if not products:
+                break
+            for product in products:
+                yield schemas.DisplayProduct.model_validate(product).model_dump_json() + "\n"
+            after = products[-1].id
+            # Libera os objetos do lote anterior da identity map da sessão.
+            db.expunge_all()
+
+
+
+def check_batch_ids(ids: List[int]):
+    """Função que valida a quantidade de IDs de uma consulta em lote.
+
+    Raises:
+        HTTPException: 400 se vierem mais de MAX_BATCH_IDS IDs
+    """
+    if len(ids) > MAX_BATCH_IDS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail=f"No máximo {MAX_BATCH_IDS} IDs por consulta")
+
+
+async def _products_by_ids(db: AsyncSession, ids: List[int]):
+    """Função que busca vários produtos pelo ID, mantendo a ordem pedida.
+
+    São só duas consultas, qualquer que seja a quantidade de IDs: uma com IN nos produtos e outra
+    (selectinload) com IN nos vendedores desses produtos.
+
+    Args:
+        db (AsyncSession): Sessão do banco de dados
+        ids (list): IDs pedidos (podem se repetir)
+
+    Returns:
+        list: Um schemas.ProductLookup por ID pedido, com found=False para os que não existem
+    """
+    check_batch_ids(ids)
+    if not ids:
+        return []
+    result = await db.execute(select(models.Product)
+                              .where(models.Product.id.in_(set(ids)))
+                              .options(selectinload(models.Product.seller)))
+    products = {product.id: product for product in result.scalars()}
+    return [schemas.ProductLookup(id=id, found=id in products, product=products.get(id)) for id in ids]
+
+
+async def _iter_bulk_rows(request: Request):
+    """Gerador que lê o corpo da carga em lote, em JSON (lista) ou NDJSON (um produto por linha).
+
+    No NDJSON o corpo é lido aos poucos, conforme chega, sem carregar tudo na memória.
+
+    Yields:
+        tuple: Posição da linha e a linha NDJSON ainda não validada, ou o item da lista JSON
+    """
+    if request.headers.get("content-type", "").startswith("application/x-ndjson"):
+        row = 0
+        buffer = b""
+        async for piece in request.stream():
+            buffer += piece
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield row, line
+                    row += 1
+        if buffer.strip():
+            yield row, buffer
+    else:
+        try:
+            rows = await request.json()
+        except ValueError:
+            # JSONDecodeError e UnicodeDecodeError são subclasses de ValueError.
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="JSON inválido")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                                detail="O corpo deve ser uma lista de produtos ou NDJSON")
+        for row, item in enumerate(rows):
+            yield row, item
+
+
+
+# Depends(get_async_db) é um mecanismo do FastAPI que permite injetar dependências em rotas.
 # ou seja, é uma função depende de outra função para retornar um determinado valor.
+# As rotas são async def: enquanto esperam o banco, o event loop atende outras requisições.
 
 # código 201 indica que uma nova linha foi criada com sucesso no banco de dados.
 @router.post("/addProduct", status_code=status.HTTP_201_CREATED)
-def add_product(seller_id: int, request: schemas.Product, db: Session = Depends(get_db)):
+async def add_product(seller_id: int, request: schemas.Product, db: AsyncSession = Depends(get_async_db)):
     """Função que adiciona um novo produto.
 
     Args:
@@ -28,7 +186,7 @@ def add_product(seller_id: int, request: schemas.Product, db: Session = Depends(
     Returns:
         dict: Mensagem de confirmação com os detalhes do produto adicionado
     """
-    seller = db.query(models.Seller).filter(models.Seller.id == seller_id).first()
+    seller = await db.get(models.Seller, seller_id)
     if seller is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail="Vendedor não encontrado")
@@ -41,49 +199,313 @@ def add_product(seller_id: int, request: schemas.Product, db: Session = Depends(
     )
 
     db.add(new_product) # inserindo novo produto na sessão do banco de dados
-    db.commit() # confirmando a transação
-    db.refresh(new_product) # salvando o novo produto no banco de dados e atualizando o objeto na sessão
+    await db.commit() # confirmando a transação
+    await db.refresh(new_product) # salvando o novo produto no banco de dados e atualizando o objeto na sessão
+    await response_cache.invalidate()
+    product_changes.publish("create", _product_event(new_product))
     return {"message": "Product added successfully", "product": request}
 
+@router.post("/bulkAddProducts", status_code=status.HTTP_201_CREATED,
+             openapi_extra={"requestBody": {"content": {
+                 "application/json": {"schema": {"type": "array", "items": schemas.BulkProduct.model_json_schema()}},
+                 "application/x-ndjson": {"schema": {"type": "string"}}}}})
+async def bulk_add_products(request: Request,
+                            seller_id: Optional[int] = Query(None, description="Vendedor dos produtos que não informarem seller_id"),
+                            chunk_size: int = Query(BULK_CHUNK_SIZE, ge=1, le=MAX_BULK_CHUNK_SIZE),
+                            db: AsyncSession = Depends(get_async_db)):
+    """Função que adiciona vários produtos de uma vez.
+
+    O corpo pode ser uma lista JSON ou NDJSON (Content-Type: application/x-ndjson) de produtos.
+    Os produtos são gravados em blocos de chunk_size, com uma única transação e um único INSERT
+    (executemany) por bloco. Os vendedores de cada bloco são validados com uma única consulta
+    (WHERE id IN ...), e os já validados não são consultados de novo.
+
+    Args:
+        seller_id (int, optional): Vendedor padrão dos produtos. Defaults to None.
+        chunk_size (int, optional): Quantidade de produtos por transação. Defaults to 1000.
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_async_db).
+
+    Returns:
+        dict: Quantidade de produtos inseridos e os erros de cada linha recusada
+    """
+    inserted = 0
+    errors = []
+    known_sellers = set()
+    chunk = []
+
+    async def flush():
+        nonlocal inserted
+        missing = {product.seller_id for _, product in chunk} - known_sellers
+        if missing:
+            result = await db.execute(select(models.Seller.id).where(models.Seller.id.in_(missing)))
+            known_sellers.update(result.scalars())
+
+        rows = []
+        for row, product in chunk:
+            if product.seller_id not in known_sellers:
+                errors.append({"row": row, "error": "Vendedor não encontrado"})
+            else:
+                rows.append(product.model_dump())
+        if rows:
+            await db.execute(insert(models.Product), rows)
+            await db.commit()
+            inserted += len(rows)
+        chunk.clear()
+
+    row = -1
+    async for row, raw in _iter_bulk_rows(request):
+        try:
+            if isinstance(raw, bytes):
+                product = schemas.BulkProduct.model_validate_json(raw)
+            else:
+                product = schemas.BulkProduct.model_validate(raw)
+        except ValidationError as e:
+            errors.append({"row": row, "error": e.errors(include_url=False, include_input=False)})
+            continue
+
+        if product.seller_id is None:
+            product.seller_id = seller_id
+        if product.seller_id is None:
+            errors.append({"row": row, "error": "seller_id não informado"})
+            continue
+
+        chunk.append((row, product))
+        if len(chunk) >= chunk_size:
+            await flush()
+
+    if chunk:
+        await flush()
+    if inserted:
+        await response_cache.invalidate()
+        # O executemany não retorna os IDs, então o evento só avisa que a listagem deve ser baixada de novo.
+        product_changes.publish("bulk_create", {"inserted": inserted})
+
+    # Os erros de vendedor só aparecem quando o bloco é gravado, depois dos erros de validação das linhas
+    # seguintes; a ordenação (estável) devolve a lista na ordem das linhas.
+    errors.sort(key=lambda error: error["row"])
+    return {"message": "Carga concluída", "received": row + 1, "inserted": inserted, "errors": errors}
+
+async def _may_cache(db: AsyncSession, modified_at: float = None) -> bool:
+    """Função que indica se uma leitura pode ser guardada no cache de respostas.
+
+    Logo depois de uma alteração, a réplica pode ainda não ter recebido a mudança. O que ela devolver nesse
+    intervalo é enviado ao cliente, mas não é guardado, senão a versão antiga ficaria no cache (com a
+    geração nova) até a próxima alteração. Pelo mesmo motivo, essa resposta não leva o Last-Modified.
+    """
+    if db.bind is async_engine:
+        return True
+    if modified_at is None:
+        modified_at = await response_cache.modified_at()
+    return modified_at is None or time.time() - modified_at >= READ_YOUR_WRITES_SECONDS
+
+def _product_event(product: models.Product) -> dict:
+    return {"id": product.id, "name": product.name, "price": product.price, "description": product.description,
+            "seller_id": product.seller_id, "version": product.version}
+
+@router.get("/changes", response_class=StreamingResponse)
+async def product_changes_feed(request: Request,
+                               since: Optional[int] = Query(None, description="Último número de evento recebido")):
+    """Função que envia as alterações de produtos em Server-Sent Events (text/event-stream).
+
+    Cada evento tem o número de sequência no "id" e o tipo no "event": create, update (com os campos
+    alterados), delete, bulk_create (carga em lote; baixe a listagem de novo) ou reset (eventos perdidos;
+    baixe a listagem de novo e continue a partir do número do reset).
+
+    Args:
+        since (int, optional): Último número recebido; sem ele, usa o cabeçalho Last-Event-ID e, sem os
+            dois, envia só as alterações a partir de agora. Defaults to None.
+
+    Example:
+        curl -N /api/v1/products/changes?since=1718000000123
+    """
+    return product_changes.response(request, since)
+
 @router.get("/listAllProducts", response_model=List[schemas.DisplayProduct])
-def list_all_products(db: Session = Depends(get_db)):
-    """Função que retorna todos os produtos.
+async def list_all_products(request: Request,
+                            limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                            after: Optional[int] = Query(None, description="ID do último produto da página anterior"),
+                            stream: bool = Query(False, description="Exporta todos os produtos em NDJSON"),
+                            db: AsyncSession = Depends(get_read_db)):
+    """Função que retorna os produtos paginados por cursor.
+
+    Args:
+        limit (int, optional): Quantidade máxima de produtos na página. Defaults to 100.
+        after (int, optional): Cursor, ID do último produto recebido. Defaults to None.
+        stream (bool, optional): Se True, retorna todos os produtos a partir do cursor em NDJSON,
+            lidos do banco em lotes. Defaults to False.
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_read_db).
+
+    Returns:
+        list: Lista de produtos. O cabeçalho X-Next-Cursor traz o cursor da próxima página
+            e o ETag identifica a versão da página (If-None-Match devolve 304). O Last-Modified é a data da
+            última alteração do catálogo; com If-Modified-Since igual ou posterior, a resposta é 304 sem
+            consultar o cache nem o banco. Com o cache em memória e vários workers não há Last-Modified.
+
+    Example:
+        /api/v1/products/listAllProducts?limit=50&after=150
+    """
+    if stream:
+        return StreamingResponse(_stream_products_ndjson(after, db.bind), media_type="application/x-ndjson")
+
+    # A data é lida antes do banco: uma alteração durante a consulta deixa a data mais antiga, nunca
+    # mais nova que os dados enviados.
+    modified_at = await response_cache.last_modified()
+    if is_not_modified(request.headers, modified_at):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=last_modified_headers(modified_at))
+
+    key = await response_cache.list_key(after, limit)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        return cached_response(request, *cached, modified_at)
+
+    if FAST_JSON:
+        products = await _product_rows_page(db, after, limit)
+        with timed("serialize"):
+            body = serialize_product_rows(products)
+    else:
+        products = await _products_page(db, after, limit)
+        with timed("serialize"):
+            body = _product_list_adapter.dump_json(_product_list_adapter.validate_python(products, from_attributes=True))
+    headers = {"X-Next-Cursor": str(products[-1].id)} if len(products) == limit else {}
+    fresh = await _may_cache(db, modified_at)
+    headers = await response_cache.set(key, body, headers, store=fresh)
+    # Uma réplica talvez atrasada não recebe o Last-Modified: com a data da alteração nova num corpo antigo,
+    # o If-Modified-Since do cliente daria 304 mesmo depois de a réplica se atualizar.
+    return cached_response(request, body, headers, modified_at if fresh else None)
+
+@router.get("/search", response_model=List[schemas.DisplayProduct])
+async def search_products(q: Optional[str] = Query(None, description="Palavras buscadas no nome e na descrição"),
+                          name: Optional[str] = Query(None, description="Início do nome (diferencia maiúsculas)"),
+                          name_contains: Optional[str] = Query(None, description="Trecho do nome"),
+                          min_price: Optional[float] = Query(None, ge=0),
+                          max_price: Optional[float] = Query(None, ge=0),
+                          seller_id: Optional[int] = None,
+                          sort: str = Query("id", pattern="^-?(id|name|price)$",
+                                            description="Campo de ordenação; o prefixo - inverte a ordem"),
+                          limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                          offset: int = Query(0, ge=0),
+                          db: AsyncSession = Depends(get_read_db)):
+    """Função que busca produtos com filtros combinados.
+
+    Os filtros de nome (prefixo), preço e vendedor usam os índices da tabela de produtos. A busca
+    por palavras (q) usa a tabela FTS5 do SQLite, sem varrer a tabela inteira.
+
+    Args:
+        q (str, optional): Palavras buscadas no nome e na descrição (por prefixo). Defaults to None.
+        name (str, optional): Prefixo do nome. Defaults to None.
+        name_contains (str, optional): Trecho do nome, em qualquer posição. Defaults to None.
+        min_price (float, optional): Preço mínimo. Defaults to None.
+        max_price (float, optional): Preço máximo. Defaults to None.
+        seller_id (int, optional): ID do vendedor. Defaults to None.
+        sort (str, optional): id, name ou price, com - na frente para ordem decrescente. Defaults to "id".
+        limit (int, optional): Quantidade máxima de produtos. Defaults to 100.
+        offset (int, optional): Quantidade de produtos pulados. Defaults to 0.
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_read_db).
+
+    Returns:
+        list: Lista de produtos encontrados
+
+    Example:
+        /api/v1/products/search?q=cadeira&min_price=100&max_price=500&sort=-price
+    """
+    query = select(models.Product).options(joinedload(models.Product.seller, innerjoin=True))
+
+    # Só espaços não é uma busca: o FTS5 recusaria o MATCH vazio.
+    q = q.strip() if q else None
+    if q:
+        if supports_full_text_search(db.bind):
+            matches = text(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :terms").bindparams(terms=fts_query(q))
+            query = query.where(models.Product.id.in_(matches))
+        else:
+            query = query.where(or_(models.Product.name.contains(q, autoescape=True),
+                                    models.Product.description.contains(q, autoescape=True)))
+    if name:
+        # Comparação por faixa em vez de LIKE 'abc%': assim o SQLite consegue usar o índice do nome.
+        query = query.where(models.Product.name >= name, models.Product.name < name + "\U0010ffff")
+    if name_contains:
+        query = query.where(models.Product.name.contains(name_contains, autoescape=True))
+    if min_price is not None:
+        query = query.where(models.Product.price >= min_price)
+    if max_price is not None:
+        query = query.where(models.Product.price <= max_price)
+    if seller_id is not None:
+        query = query.where(models.Product.seller_id == seller_id)
+
+    column = getattr(models.Product, sort.lstrip("-"))
+    order = column.desc() if sort.startswith("-") else column.asc()
+    # O ID desempata produtos com o mesmo nome ou preço, para a paginação ser estável.
+    query = query.order_by(order, models.Product.id).limit(limit).offset(offset)
+
+    result = await db.execute(query)
+    return result.scalars().all()
+
+@router.get("/getProducts", response_model=List[schemas.ProductLookup])
+async def get_products(ids: List[int] = Query(..., description=f"IDs dos produtos (até {MAX_BATCH_IDS}), "
+                                                                 "ex: ?ids=3&ids=1"),
+                       db: AsyncSession = Depends(get_read_db)):
+    """Função que retorna vários produtos pelo ID numa só requisição (ex: os itens de um carrinho).
+
+    Args:
+        ids (list): IDs dos produtos, na ordem desejada
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_read_db).
+
+    Returns:
+        list: Um item por ID pedido, na mesma ordem, com found=False para os produtos não encontrados
+    """
+    return await _products_by_ids(db, ids)
+
+@router.post("/getProducts", response_model=List[schemas.ProductLookup])
+async def get_products_by_body(request: schemas.BatchIds, db: AsyncSession = Depends(get_read_db)):
+    """Função igual à get_products, com os IDs no corpo da requisição (para listas que não cabem na URL).
 
     Args:
-        db (Session, optional): Sessão do banco de dados. Defaults to Depends(get_db).
+        request (schemas.BatchIds): IDs dos produtos, na ordem desejada
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_read_db).
 
     Returns:
-        list: Lista de produtos
+        list: Um item por ID pedido, na mesma ordem, com found=False para os produtos não encontrados
     """
-    products = db.query(models.Product).all()
-    return products
+    return await _products_by_ids(db, request.ids)
 
 @router.get("/getProduct/{product_id}", response_model=schemas.DisplayProduct)
-def get_product(product_id: int, db: Session = Depends(get_db), response: Response = None):
+async def get_product(product_id: int, request: Request, db: AsyncSession = Depends(get_read_db)):
     """Função que retorna um produto específico pelo ID.
 
     Args:
         product_id (int): ID do produto a ser retornado
-        db (Session, optional): Sessão do banco de dados. Defaults to Depends(get_db).
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_read_db).
 
     Returns:
-        Product: Produto encontrado ou None se não encontrado
+        Product: Produto encontrado ou None se não encontrado. O ETag identifica a versão do produto.
     """
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    key = response_cache.product_key(product_id)
+    cached = await response_cache.get(key)
+    if cached is not None:
+        return cached_response(request, *cached)
+
+    # No modo assíncrono não existe carregamento preguiçoso (lazy load) do relacionamento,
+    # então o vendedor precisa vir junto na mesma consulta.
+    product = await db.get(models.Product, product_id, options=[joinedload(models.Product.seller)])
 
     if not product:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, 
                             detail="Produto não encontrado")
         
-    return product
+    with timed("serialize"):
+        body = schemas.DisplayProduct.model_validate(product).model_dump_json().encode()
+    headers = await response_cache.set(key, body, store=await _may_cache(db))
+    return cached_response(request, body, headers)
 
 @router.delete("/deleteProduct/{product_id}")
-def delete_product(product_id: int, db: Session = Depends(get_db), current_user: schemas.Seller = Depends(get_current_user)):
+async def delete_product(product_id: int, db: AsyncSession = Depends(get_async_db), current_user: schemas.Seller = Depends(get_current_user)):
     """Função que deleta um produto pelo ID.
 
     Args:
         product_id (int): ID do produto a ser deletado
-        db (Session, optional): Sessão do banco de dados. Defaults to Depends(get_db).
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_async_db).
+
+    Raises:
+        HTTPException: 403 se o usuário não for o admin e 404 se o produto não existir
 
     Returns:
     """
@@ -93,26 +515,34 @@ def delete_product(product_id: int, db: Session = Depends(get_db), current_user:
     # Isso pode melhorar o desempenho, especialmente em operações de exclusão em massa.
     # Mas se você quiser que a sessão atual seja atualizada imediatamente após a exclusão, você pode usar synchronize_session=True.
     if current_user.username == "admin":
-        db.query(models.Product).filter(models.Product.id == product_id).delete(synchronize_session=False)
-        db.commit()
+        result = await db.execute(delete(models.Product)
+                                  .where(models.Product.id == product_id)
+                                  .execution_options(synchronize_session=False))
+        await db.commit()
+        # Nada foi apagado: sem invalidar o cache nem avisar o feed de alterações.
+        if result.rowcount == 0:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Produto não encontrado")
+        await response_cache.invalidate(product_id)
+        product_changes.publish("delete", {"id": product_id})
         return {"message": "Produto deletado com sucesso", "product_id": product_id}
     else:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, 
                             detail="Acesso negado. Apenas administradores podem excluir produtos.")
 
 @router.put("/updateProduct/{product_id}")
-def update_product(product_id: int, request: schemas.Product, db: Session = Depends(get_db)):
+async def update_product(product_id: int, request: schemas.Product, db: AsyncSession = Depends(get_async_db)):
     """Função que atualiza um produto pelo ID.
 
     Args:
         product_id (int): ID do produto a ser atualizado
         request (schemas.Product): Dados do produto a serem atualizados
-        db (Session, optional): Sessão do banco de dados. Defaults to Depends(get_db).
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_async_db).
 
     Returns:
         dict: Mensagem de confirmação com os detalhes do produto atualizado
     """
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    product = await db.get(models.Product, product_id)
     
     if not product:
         return {"message": "Produto não encontrado", "product_id": product_id}
@@ -123,9 +553,64 @@ def update_product(product_id: int, request: schemas.Product, db: Session = Depe
     product.description = request.description
     product.seller_id = request.seller_id if hasattr(request, 'seller_id') else product.seller_id 
 
-    db.commit()
-    db.refresh(product)
+    # O UPDATE confere a versão lida acima; se outra requisição alterou o produto nesse meio-tempo,
+    # nenhuma linha é atualizada e o SQLAlchemy levanta StaleDataError.
+    try:
+        await db.commit()
+    except StaleDataError:
+        await db.rollback()
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail="O produto foi alterado por outra requisição, tente novamente")
+    await db.refresh(product)
+    await response_cache.invalidate(product_id)
+    product_changes.publish("update", _product_event(product))
     
     return {"message": "Produto atualizado com sucesso", "product": product}
 
+@router.patch("/updateProduct/{product_id}")
+async def patch_product(product_id: int, request: schemas.ProductPatch, db: AsyncSession = Depends(get_async_db)):
+    """Função que atualiza só os campos enviados de um produto, com controle de concorrência otimista.
+
+    A alteração é um único UPDATE ... WHERE id = ? AND version = ?, que já incrementa a versão e a retorna
+    (RETURNING), sem ler o produto antes. Se a versão enviada não for mais a atual, outro cliente alterou
+    o produto depois da leitura e a resposta é 409, em vez de sobrescrever a alteração dele.
+
+    Args:
+        product_id (int): ID do produto a ser atualizado
+        request (schemas.ProductPatch): Campos alterados e a versão lida pelo cliente
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_async_db).
+
+    Raises:
+        HTTPException: 404 se o produto não existir e 409 se a versão não for a atual
+
+    Returns:
+        dict: Mensagem de confirmação com o ID e a nova versão do produto
+    """
+    changes = request.model_dump(exclude_unset=True, exclude={"version"})
+    if not changes:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST,
+                            detail="Nenhum campo para atualizar")
+
+    result = await db.execute(update(models.Product)
+                              .where(models.Product.id == product_id, models.Product.version == request.version)
+                              .values(**changes, version=models.Product.version + 1)
+                              .returning(models.Product.version)
+                              .execution_options(synchronize_session=False))
+    new_version = result.scalar()
+    if new_version is None:
+        # Só no caminho de erro é feita uma consulta a mais, para diferenciar 404 de 409.
+        current = await db.scalar(select(models.Product.version).where(models.Product.id == product_id))
+        if current is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND,
+                                detail="Produto não encontrado")
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT,
+                            detail={"message": "O produto foi alterado por outra requisição",
+                                    "current_version": current})
+
+    await db.commit()
+    await response_cache.invalidate(product_id)
+    # Só os campos enviados vão no evento, como no próprio PATCH.
+    product_changes.publish("update", {"id": product_id, **changes, "version": new_version})
+    return {"message": "Produto atualizado com sucesso", "product_id": product_id, "version": new_version}
+
 
@@ -1,30 +1,31 @@
-from fastapi import APIRouter, status, Response, HTTPException
+from fastapi import APIRouter, status, Query
 from fastapi.params import Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 from .. import schemas, models # .. volta um diretório na hierarquia de pacotes
-from ..database import get_db # .. volta um diretório na hierarquia de pacotes
-from passlib.context import CryptContext # serve para transformar senhas em hash.
+from ..database import get_async_db, get_read_db # .. volta um diretório na hierarquia de pacotes
+from ..hashing import password_hasher
+from ..rate_limit import limit_per_ip, SIGNUP_RATE_PER_IP
+from ..seller_stats import seller_stats_query
+from .product import MAX_BATCH_IDS, check_batch_ids
 
 router = APIRouter(
     tags=['Sellers'],
     prefix="/api/v1/sellers"  # Prefixo para todas as rotas deste router
 )
 
-# Contexto de criptografia para senhas, usando bcrypt como algoritmo de hash.
-# O bcrypt é um algoritmo de hash seguro e amplamente utilizado para armazenar senhas.
-# O bcrypt a ser instalado deve ser a versão 4.0.1 para não dar o warning
-# AttributeError: module 'bcrypt' has no attribute '__about__'
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")  
-
 # O response_model é usado para especificar o modelo de resposta que será retornado pela rota.
 # Com isso consigo configurar para que ele não retorne a senha descriptografada no response_body.
-@router.post("/addNewSeller", status_code=status.HTTP_201_CREATED)
-def add_new_seller(request: schemas.Seller, db: Session = Depends(get_db)):
+# O cadastro também faz um hash bcrypt, então cada IP tem um limite de cadastros (429 antes do hash).
+@router.post("/addNewSeller", status_code=status.HTTP_201_CREATED,
+             dependencies=[Depends(limit_per_ip("signup", SIGNUP_RATE_PER_IP))])
+async def add_new_seller(request: schemas.Seller, db: AsyncSession = Depends(get_async_db)):
     """Função que cria um novo vendedor.
 
     Args:
         request (schemas.Seller): Dados do vendedor a ser criado
-        db (Session, optional): Sessão do banco de dados. Defaults to Depends(get_db).
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_async_db).
 
     Returns:
         dict: Mensagem de confirmação com os detalhes do vendedor criado
@@ -32,7 +33,8 @@ def add_new_seller(request: schemas.Seller, db: Session = Depends(get_db)):
 
     # Aqui estamos usando o CryptContext para hashear a senha do vendedor antes de armazená-la no banco de dados.
     # O hash é uma representação criptográfica da senha, que é mais segura do que armazenar a senha em texto simples.
-    hashed_password = pwd_context.hash(request.password)
+    # O bcrypt é pesado para a CPU, então roda no pool de processos do password_hasher.
+    hashed_password = await password_hasher.hash(request.password)
 
     new_seller = models.Seller(
         username=request.username,
@@ -41,12 +43,79 @@ def add_new_seller(request: schemas.Seller, db: Session = Depends(get_db)):
     )
 
     db.add(new_seller)
-    db.commit()
-    db.refresh(new_seller)
+    await db.commit()
+    await db.refresh(new_seller)
 
     output_seller = schemas.DisplaySeller(
         username=new_seller.username,
         email=new_seller.email
     )
     
-    return {"message": "Vendedor criado com sucesso", "seller": output_seller}
\ No newline at end of file
+    return {"message": "Vendedor criado com sucesso", "seller": output_seller}
+
+
+async def _sellers_by_ids(db: AsyncSession, ids: List[int]):
+    """Função que busca vários vendedores pelo ID com uma única consulta (IN), mantendo a ordem pedida.
+
+    Returns:
+        list: Um schemas.SellerLookup por ID pedido, com found=False para os que não existem
+    """
+    check_batch_ids(ids)
+    if not ids:
+        return []
+    result = await db.execute(select(models.Seller).where(models.Seller.id.in_(set(ids))))
+    sellers = {seller.id: seller for seller in result.scalars()}
+    return [schemas.SellerLookup(id=id, found=id in sellers, seller=sellers.get(id)) for id in ids]
+
+@router.get("/getSellers", response_model=List[schemas.SellerLookup])
+async def get_sellers(ids: List[int] = Query(..., description=f"IDs dos vendedores (até {MAX_BATCH_IDS}), "
+                                                                "ex: ?ids=3&ids=1"),
+                      db: AsyncSession = Depends(get_read_db)):
+    """Função que retorna vários vendedores pelo ID numa só requisição.
+
+    Args:
+        ids (list): IDs dos vendedores, na ordem desejada
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_read_db).
+
+    Returns:
+        list: Um item por ID pedido, na mesma ordem, com found=False para os vendedores não encontrados
+    """
+    return await _sellers_by_ids(db, ids)
+
+@router.post("/getSellers", response_model=List[schemas.SellerLookup])
+async def get_sellers_by_body(request: schemas.BatchIds, db: AsyncSession = Depends(get_read_db)):
+    """Função igual à get_sellers, com os IDs no corpo da requisição.
+
+    Args:
+        request (schemas.BatchIds): IDs dos vendedores, na ordem desejada
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_read_db).
+
+    Returns:
+        list: Um item por ID pedido, na mesma ordem, com found=False para os vendedores não encontrados
+    """
+    return await _sellers_by_ids(db, request.ids)
+
+@router.get("/listSellerStats", response_model=List[schemas.SellerStats])
+async def list_seller_stats(seller_id: Optional[int] = Query(None, description="Só os agregados deste vendedor"),
+                            db: AsyncSession = Depends(get_read_db)):
+    """Função que retorna, por vendedor, a quantidade de produtos, os preços mínimo, máximo e médio e o
+    valor total do catálogo.
+
+    Os valores vêm da tabela seller_stats, já calculada a cada alteração de produto, então a consulta
+    lê uma linha por vendedor em vez de percorrer todos os produtos.
+
+    Args:
+        seller_id (int, optional): Filtra um único vendedor. Defaults to None (todos).
+        db (AsyncSession, optional): Sessão do banco de dados. Defaults to Depends(get_read_db).
+
+    Returns:
+        list: Agregados de cada vendedor, ordenados pelo ID do vendedor
+    """
+    query = seller_stats_query(db.bind)
+    if seller_id is not None:
+        query = query.where(models.Seller.id == seller_id)
+    result = await db.execute(query.order_by(models.Seller.id))
+    return [schemas.SellerStats(seller_id=id, username=username, product_count=count,
+                                min_price=min_price, max_price=max_price,
+                                avg_price=price_sum / count if count else None, total_value=price_sum)
+            for id, username, count, price_sum, min_price, max_price in result]
\ No newline at end of file
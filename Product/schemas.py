@@ -11,7 +11,7 @@ class DisplaySeller(BaseModel):
 class Product(BaseModel):
     name: str
     price: float
-    description: str = None  # Optional field, default is None
+    description: str | None = None  # Optional field, default is None
 
     class Config:
         json_schema_extra = {
@@ -22,16 +22,69 @@ class Product(BaseModel):
             }
         }
 
+# classe de entrada da carga em lote, onde cada produto pode indicar o seu vendedor.
+class BulkProduct(Product):
+    seller_id: int | None = None  # Se não informado, usa o seller_id passado na URL
+
+# classe de entrada da atualização parcial (PATCH): só os campos enviados são alterados.
+class ProductPatch(BaseModel):
+    name: str = None  # Se não informado, não é alterado (null não é aceito)
+    price: float = None  # Se não informado, não é alterado (null não é aceito)
+    description: str | None = None
+    version: int  # Versão lida pelo cliente; se o produto mudou desde então, a resposta é 409
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "price": 17.99,
+                "version": 3,
+            }
+        }
+
 # classe para exibir a saída do produto com o relacionamento com o vendedor.
 class DisplayProduct(BaseModel):
     name: str
     price: float
-    description: str = None  # Optional field, default is None
+    description: str | None = None  # Optional field, default is None
+    version: int = 1  # Versão atual, usada no PATCH do produto
     seller: DisplaySeller 
 
     class Config:
         from_attributes = True # Permite que o Pydantic converta modelos ORM em dicionários
 
+# classe de entrada das consultas em lote por ID (POST), com os IDs na ordem desejada.
+class BatchIds(BaseModel):
+    ids: list[int]
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "ids": [3, 1, 42],
+            }
+        }
+
+# classes de saída das consultas em lote: um item por ID pedido, na mesma ordem, com found=False
+# (e sem o produto/vendedor) quando o ID não existe.
+class ProductLookup(BaseModel):
+    id: int
+    found: bool
+    product: DisplayProduct | None = None
+
+class SellerLookup(BaseModel):
+    id: int
+    found: bool
+    seller: DisplaySeller | None = None
+
+# classe de saída dos agregados de produtos de um vendedor.
+class SellerStats(BaseModel):
+    seller_id: int
+    username: str
+    product_count: int
+    min_price: float | None = None  # None quando o vendedor não tem produtos
+    max_price: float | None = None
+    avg_price: float | None = None
+    total_value: float  # soma dos preços dos produtos do vendedor
+
 class Seller(BaseModel):
     username: str
     email: str
@@ -0,0 +1,83 @@
+from sqlalchemy import inspect, text
+
+"""
+Busca textual de produtos com a tabela virtual FTS5 do SQLite. A tabela products_fts indexa o nome e a
+descrição dos produtos e é mantida em sincronia pelos triggers abaixo (inclusive nas cargas em lote,
+que não passam pelo ORM). Em outros bancos a busca cai no LIKE, sem índice.
+"""
+
+FTS_TABLE = "products_fts"
+
+# Trigger de UPDATE só para as colunas indexadas: uma alteração só de preço não mexe no índice textual.
+FTS_UPDATE_TRIGGER = f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF name, description ON products BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+            INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+        END"""
+
+# Triggers que espelham cada INSERT, UPDATE e DELETE da tabela products na products_fts.
+# Como a products_fts é uma tabela de "conteúdo externo" (content='products'), para remover uma linha
+# é preciso inserir o comando 'delete' com os valores antigos.
+FTS_DDL = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE}
+        USING fts5(name, description, content='products', content_rowid='id')""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, name, description) VALUES (new.id, new.name, new.description);
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+            VALUES ('delete', old.id, old.name, old.description);
+        END""",
+    FTS_UPDATE_TRIGGER,
+]
+
+
+def supports_full_text_search(bind) -> bool:
+    """Função que indica se o banco de dados suporta a busca FTS5 (apenas SQLite)."""
+    return bind.dialect.name == "sqlite"
+
+
+def setup_full_text_search(connection):
+    """Função que cria a tabela FTS5 e os triggers, se ainda não existirem (usada pelas migrações).
+
+    Quando a tabela é criada num banco que já tem produtos, o índice é reconstruído a partir deles.
+
+    Args:
+        connection (Connection): Conexão síncrona com o banco de dados, dentro de uma transação
+    """
+    if not supports_full_text_search(connection):
+        return
+
+    is_new = not inspect(connection).has_table(FTS_TABLE)
+    for statement in FTS_DDL:
+        connection.execute(text(statement))
+    if is_new:
+        connection.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+
+def narrow_full_text_search_update_trigger(connection):
+    """Função que recria o trigger de UPDATE da busca textual só para as colunas name e description.
+
+    Bancos criados antes tinham o trigger em qualquer UPDATE, que refazia o índice até numa troca de preço.
+
+    Args:
+        connection (Connection): Conexão síncrona com o banco de dados, dentro de uma transação
+    """
+    if not supports_full_text_search(connection):
+        return
+
+    connection.execute(text(f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au"))
+    connection.execute(text(FTS_UPDATE_TRIGGER))
+
+
+def fts_query(terms: str) -> str:
+    """Função que transforma o texto digitado numa consulta FTS5 segura.
+
+    Cada palavra vira um termo entre aspas (assim caracteres especiais do FTS5 não geram erro de sintaxe)
+    com busca por prefixo, e todas as palavras precisam aparecer.
+
+    Example:
+        fts_query('cadeira gam') -> '"cadeira"* "gam"*'
+    """
+    words = [word.replace('"', '""') for word in terms.split()]
+    return " ".join(f'"{word}"*' for word in words)
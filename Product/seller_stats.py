@@ -0,0 +1,127 @@
+from sqlalchemy import func, select, text
+from . import models
+
+"""
+Agregados de produtos por vendedor (quantidade, preço mínimo, máximo, médio e valor total do catálogo).
+
+Os agregados ficam pré-calculados na tabela seller_stats, uma linha por vendedor, mantida pelos triggers
+abaixo a cada INSERT, UPDATE e DELETE da tabela products. Assim o addProduct, o updateProduct (PUT e
+PATCH), o deleteProduct e a carga em lote atualizam os agregados na mesma transação, sem código extra
+nas rotas, e a leitura custa O(vendedores) em vez de percorrer todos os produtos.
+
+A soma e a quantidade são ajustadas de forma incremental. O mínimo e o máximo também, exceto quando o
+produto removido (ou alterado) era o próprio mínimo/máximo: nesse caso o valor é recalculado só com os
+produtos daquele vendedor (índice em seller_id).
+
+Os triggers usam a sintaxe do SQLite; em outros bancos a rota calcula os agregados com GROUP BY.
+"""
+
+# Remove um produto (valores antigos) dos agregados do seu vendedor.
+_REMOVE_OLD = """
+            UPDATE seller_stats SET
+                product_count = product_count - 1,
+                price_sum = price_sum - old.price,
+                min_price = CASE WHEN old.price <= min_price
+                    THEN (SELECT MIN(price) FROM products WHERE seller_id = old.seller_id) ELSE min_price END,
+                max_price = CASE WHEN old.price >= max_price
+                    THEN (SELECT MAX(price) FROM products WHERE seller_id = old.seller_id) ELSE max_price END
+            WHERE seller_id = old.seller_id;"""
+
+# Soma um produto (valores novos) aos agregados do seu vendedor, criando a linha se ainda não existir.
+_ADD_NEW = """
+            INSERT INTO seller_stats (seller_id, product_count, price_sum, min_price, max_price)
+            VALUES (new.seller_id, 1, new.price, new.price, new.price)
+            ON CONFLICT (seller_id) DO UPDATE SET
+                product_count = product_count + 1,
+                price_sum = price_sum + excluded.price_sum,
+                min_price = CASE WHEN min_price IS NULL OR excluded.min_price < min_price
+                    THEN excluded.min_price ELSE min_price END,
+                max_price = CASE WHEN max_price IS NULL OR excluded.max_price > max_price
+                    THEN excluded.max_price ELSE max_price END;"""
+
+SELLER_STATS_TRIGGERS = [
+    f"""CREATE TRIGGER IF NOT EXISTS seller_stats_ai AFTER INSERT ON products
+        WHEN new.seller_id IS NOT NULL BEGIN{_ADD_NEW}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS seller_stats_ad AFTER DELETE ON products
+        WHEN old.seller_id IS NOT NULL BEGIN{_REMOVE_OLD}
+        END""",
+    # Uma troca de preço ou de vendedor é tratada como remover o produto antigo e somar o novo. São dois
+    # triggers para que cada lado tenha a sua guarda: um produto que passa a ter seller_id NULL não pode
+    # criar uma linha com seller_id NULL (que viraria um ID automático na chave primária).
+    f"""CREATE TRIGGER IF NOT EXISTS seller_stats_au_old AFTER UPDATE OF price, seller_id ON products
+        WHEN old.seller_id IS NOT NULL BEGIN{_REMOVE_OLD}
+        END""",
+    f"""CREATE TRIGGER IF NOT EXISTS seller_stats_au_new AFTER UPDATE OF price, seller_id ON products
+        WHEN new.seller_id IS NOT NULL BEGIN{_ADD_NEW}
+        END""",
+]
+
+
+def supports_seller_stats(bind) -> bool:
+    """Função que indica se o banco de dados mantém a tabela seller_stats por triggers (apenas SQLite)."""
+    return bind.dialect.name == "sqlite"
+
+
+def setup_seller_stats(connection):
+    """Função que cria os triggers da seller_stats e recalcula a tabela a partir dos produtos (usada pelas migrações).
+
+    A tabela em si é criada pelo create_all (models.SellerStats). O recálculo completo deixa a tabela
+    correta mesmo num banco que já tinha produtos antes dos triggers existirem.
+
+    Args:
+        connection (Connection): Conexão síncrona com o banco de dados, dentro de uma transação
+    """
+    models.SellerStats.__table__.create(bind=connection, checkfirst=True)
+    if not supports_seller_stats(connection):
+        return
+
+    for statement in SELLER_STATS_TRIGGERS:
+        connection.execute(text(statement))
+    connection.execute(text("DELETE FROM seller_stats"))
+    connection.execute(text("""
+        INSERT INTO seller_stats (seller_id, product_count, price_sum, min_price, max_price)
+        SELECT seller_id, COUNT(*), SUM(price), MIN(price), MAX(price)
+        FROM products WHERE seller_id IS NOT NULL GROUP BY seller_id"""))
+
+
+def split_seller_stats_update_trigger(connection):
+    """Função que troca o trigger de UPDATE da seller_stats pelos dois triggers com guarda de seller_id NULL.
+
+    Bancos criados antes tinham um único trigger sem guarda, em que mudar o seller_id de um produto para
+    NULL criava uma linha inválida; o recálculo da tabela remove essas linhas.
+
+    Args:
+        connection (Connection): Conexão síncrona com o banco de dados, dentro de uma transação
+    """
+    if not supports_seller_stats(connection):
+        return
+
+    connection.execute(text("DROP TRIGGER IF EXISTS seller_stats_au"))
+    setup_seller_stats(connection)
+
+
+def seller_stats_query(bind):
+    """Função que monta a consulta dos agregados de todos os vendedores.
+
+    Args:
+        bind: Conexão ou engine, para saber se a tabela seller_stats é mantida pelos triggers
+
+    Returns:
+        Select: Consulta com as colunas seller_id, username, product_count, price_sum, min_price e max_price,
+            incluindo os vendedores sem produtos (quantidade 0)
+    """
+    if supports_seller_stats(bind):
+        stats = models.SellerStats
+        return (select(models.Seller.id, models.Seller.username,
+                       func.coalesce(stats.product_count, 0), func.coalesce(stats.price_sum, 0.0),
+                       stats.min_price, stats.max_price)
+                .outerjoin(stats, stats.seller_id == models.Seller.id))
+
+    # Sem os triggers, os agregados são calculados na hora (percorre todos os produtos).
+    product = models.Product
+    return (select(models.Seller.id, models.Seller.username,
+                   func.count(product.id), func.coalesce(func.sum(product.price), 0.0),
+                   func.min(product.price), func.max(product.price))
+            .outerjoin(product, product.seller_id == models.Seller.id)
+            .group_by(models.Seller.id, models.Seller.username))
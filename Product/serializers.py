@@ -0,0 +1,61 @@
+import os
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from . import models
+
+"""
+Caminho rápido (opcional) de serialização das rotas de produtos, ligado com PRODUCT_FAST_JSON=true.
+
+- FastJSONResponse: classe de resposta padrão do Product.main:app que usa o orjson para gerar o JSON.
+- product_rows_query / serialize_product_rows: em vez de carregar objetos do ORM (que passam pela identity
+  map e depois pelo DisplayProduct com from_attributes), a consulta busca só as colunas usadas na saída e
+  o JSON é montado direto das tuplas, no mesmo formato do schemas.DisplayProduct.
+
+O orjson é uma dependência opcional; sem ele, o caminho rápido continua desligado.
+"""
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - o orjson é opcional
+    orjson = None
+
+FAST_JSON = os.getenv("PRODUCT_FAST_JSON", "false").lower() == "true" and orjson is not None
+
+
+class FastJSONResponse(JSONResponse):
+    """Classe de resposta JSON que usa o orjson para serializar o conteúdo."""
+
+    def render(self, content) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def product_rows_query():
+    """Função que monta a consulta de produtos só com as colunas da saída, já com o vendedor (JOIN).
+
+    Returns:
+        Select: Consulta com as colunas id, name, price, description, version, username e email
+    """
+    return (select(models.Product.id, models.Product.name, models.Product.price, models.Product.description,
+                   models.Product.version, models.Seller.username, models.Seller.email)
+            .join(models.Seller, models.Product.seller_id == models.Seller.id))
+
+
+def product_row_to_dict(row) -> dict:
+    """Função que converte uma tupla da product_rows_query no formato do schemas.DisplayProduct."""
+    _, name, price, description, version, username, email = row
+    return {"name": name, "price": price, "description": description, "version": version,
+            "seller": {"username": username, "email": email}}
+
+
+def serialize_product_row(row) -> bytes:
+    """Função que serializa uma tupla da product_rows_query como o JSON de um DisplayProduct."""
+    return orjson.dumps(product_row_to_dict(row))
+
+
+def serialize_product_rows(rows) -> bytes:
+    """Função que serializa as tuplas da product_rows_query como uma lista JSON de DisplayProduct.
+
+    Returns:
+        bytes: JSON da lista de produtos
+    """
+    return orjson.dumps([product_row_to_dict(row) for row in rows])
@@ -0,0 +1,247 @@
+import argparse
+import os
+import random
+import signal
+import socket
+import sys
+import time
+import traceback
+
+"""
+Ponto de entrada de produção do Product.main:app, com vários processos (workers).
+
+O "uvicorn --reload" roda um único processo, então um núcleo atende todo o tráfego. Aqui o processo
+principal (master):
+- calcula o tamanho do pool de conexões de cada worker, para que a soma de todos os workers fique abaixo
+  de --db-max-connections (o banco tem um limite de conexões, que não cresce com o número de workers);
+- importa a aplicação uma única vez (preload) e aplica as migrações, antes de criar os workers, que
+  herdam tudo já carregado pelo fork (menos tempo de subida e memória compartilhada entre eles);
+- abre o socket e cria N workers (um por núcleo por padrão), que aceitam conexões no mesmo socket;
+- recria o worker que termina: cada um sai sozinho depois de --max-requests requisições (mais um valor
+  aleatório até --max-requests-jitter, para os workers não reiniciarem todos juntos), o que limita o
+  crescimento de memória;
+- no SIGTERM (ou Ctrl+C), repassa o sinal aos workers, que param de aceitar conexões e terminam as
+  requisições em andamento; quem passar de --graceful-timeout segundos é encerrado à força.
+
+Usa o fork, então roda no Linux e no macOS (no Windows use o "uvicorn Product.main:app").
+
+Com mais de um worker, os tokens revogados precisam ficar num redis compartilhado
+(TOKEN_REVOCATION_BACKEND=redis); sem isso o serve se recusa a subir.
+
+Uso:
+    TOKEN_REVOCATION_BACKEND=redis python -m Product.serve --workers 4 --port 8000 --max-requests 10000 --db-max-connections 40
+"""
+
+WORKERS = int(os.getenv("SERVE_WORKERS", str(os.cpu_count() or 1)))
+MAX_REQUESTS = int(os.getenv("SERVE_MAX_REQUESTS", "0"))  # 0 = o worker nunca é reciclado
+MAX_REQUESTS_JITTER = int(os.getenv("SERVE_MAX_REQUESTS_JITTER", "0"))
+GRACEFUL_TIMEOUT = int(os.getenv("SERVE_GRACEFUL_TIMEOUT", "30"))
+DB_MAX_CONNECTIONS = int(os.getenv("SQLARCH_MAX_CONNECTIONS", "0"))  # 0 = sem limite (usa SQLARCH_POOL_*)
+
+
+def _split_pool(connections: int) -> tuple:
+    # Metade no pool fixo e o resto como overflow.
+    pool_size = (connections + 1) // 2
+    return str(pool_size), str(connections - pool_size)
+
+
+def pool_settings(max_connections: int, workers: int) -> dict:
+    """Função que divide o limite de conexões de cada servidor de banco entre os workers.
+
+    No primário, cada worker tem dois engines (síncrono e assíncrono) e cada um pode abrir até
+    pool_size + max_overflow conexões, então o limite de cada engine é max_connections // (2 * workers).
+    Cada réplica de leitura é outro servidor, com o seu próprio limite (o mesmo max_connections), e cada
+    worker tem um único engine (assíncrono) por réplica, com max_connections // workers conexões.
+
+    Args:
+        max_connections (int): Limite total de conexões de todos os workers
+        workers (int): Quantidade de workers
+
+    Raises:
+        ValueError: Se o limite não permitir ao menos uma conexão por engine
+
+    Returns:
+        dict: Variáveis de ambiente SQLARCH_* com o pool de cada engine
+    """
+    per_engine = max_connections // (2 * workers)
+    if per_engine < 1:
+        raise ValueError(f"--db-max-connections={max_connections} não permite uma conexão por engine "
+                         f"com {workers} workers (mínimo {2 * workers})")
+    pool_size, max_overflow = _split_pool(per_engine)
+    read_pool_size, read_max_overflow = _split_pool(max_connections // workers)
+    return {"SQLARCH_POOL_SIZE": pool_size, "SQLARCH_MAX_OVERFLOW": max_overflow,
+            "SQLARCH_ASYNC_POOL_SIZE": pool_size, "SQLARCH_ASYNC_MAX_OVERFLOW": max_overflow,
+            "SQLARCH_READ_POOL_SIZE": read_pool_size, "SQLARCH_READ_MAX_OVERFLOW": read_max_overflow}
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Função que abre o socket compartilhado pelos workers."""
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_worker(app, sock: socket.socket, args):
+    """Função executada no processo filho: atende requisições até o limite de requisições ou o SIGTERM."""
+    import uvicorn
+    from .database import engine, async_engine, read_engines
+
+    # As conexões abertas pelo master (ex: nas migrações) não podem ser usadas pelo filho; o dispose com
+    # close=False descarta o pool herdado sem fechar as conexões do processo pai.
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for read_engine in read_engines:
+        read_engine.sync_engine.dispose(close=False)
+
+    # O uvicorn instala os seus próprios tratadores de SIGTERM/SIGINT (desligamento gracioso).
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+
+    max_requests = None
+    if args.max_requests:
+        max_requests = args.max_requests + random.randint(0, args.max_requests_jitter)
+
+    config = uvicorn.Config(app, log_level=args.log_level, limit_max_requests=max_requests,
+                            timeout_graceful_shutdown=args.graceful_timeout)
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+class Master:
+    """Classe do processo principal, que cria, acompanha e recicla os workers.
+
+    Args:
+        app (FastAPI): Aplicação já importada (preload)
+        sock (socket.socket): Socket compartilhado pelos workers
+        args (argparse.Namespace): Opções da linha de comando
+    """
+
+    def __init__(self, app, sock: socket.socket, args):
+        self.app = app
+        self.sock = sock
+        self.args = args
+        self.workers = {}  # pid -> número do worker
+        self.stopping = False
+
+    def spawn(self, number: int):
+        pid = os.fork()
+        if pid == 0:
+            status = 0
+            try:
+                run_worker(self.app, self.sock, self.args)
+            except BaseException:
+                traceback.print_exc()
+                status = 1
+            finally:
+                # O os._exit evita que o filho execute o resto do código do master (ex: blocos finally).
+                os._exit(status)
+        self.workers[pid] = number
+
+    def stop(self, signum, frame):
+        self.stopping = True
+        # Cópia: o sinal pode chegar no meio do reap(), que remove workers do dicionário.
+        for pid in list(self.workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def reap(self):
+        """Função que recolhe os workers que terminaram e, fora do desligamento, cria substitutos."""
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.workers.clear()
+                return
+            if pid == 0:
+                return
+            number = self.workers.pop(pid, None)
+            if number is not None and not self.stopping:
+                print(f"[serve] worker {number} (pid {pid}) terminou "
+                      f"(código {os.waitstatus_to_exitcode(status)}); criando outro", file=sys.stderr)
+                self.spawn(number)
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        for number in range(self.args.workers):
+            self.spawn(number)
+        print(f"[serve] {self.args.workers} workers em http://{self.args.host}:{self.args.port} "
+              f"(master pid {os.getpid()})", file=sys.stderr)
+
+        while not self.stopping:
+            self.reap()
+            time.sleep(0.2)
+
+        # Desligamento: espera os workers terminarem as requisições em andamento.
+        deadline = time.monotonic() + self.args.graceful_timeout + 5
+        while self.workers and time.monotonic() < deadline:
+            self.reap()
+            time.sleep(0.1)
+        for pid in list(self.workers):
+            print(f"[serve] worker pid {pid} não terminou a tempo; encerrando à força", file=sys.stderr)
+            os.kill(pid, signal.SIGKILL)
+        self.reap()
+        self.sock.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default=os.getenv("SERVE_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("SERVE_PORT", "8000")))
+    parser.add_argument("--workers", type=int, default=WORKERS, help="Quantidade de workers (padrão: núcleos)")
+    parser.add_argument("--max-requests", type=int, default=MAX_REQUESTS,
+                        help="Requisições atendidas antes do worker ser reciclado (0 = nunca)")
+    parser.add_argument("--max-requests-jitter", type=int, default=MAX_REQUESTS_JITTER,
+                        help="Valor aleatório máximo somado ao --max-requests de cada worker")
+    parser.add_argument("--graceful-timeout", type=int, default=GRACEFUL_TIMEOUT,
+                        help="Segundos para os workers terminarem as requisições ao desligar")
+    parser.add_argument("--db-max-connections", type=int, default=DB_MAX_CONNECTIONS,
+                        help="Limite total de conexões com o banco, somando todos os workers (0 = sem limite)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        parser.error("--workers deve ser pelo menos 1")
+    # Com a lista de revogados em cada processo, um token do /logout continuaria aceito nos outros workers.
+    if args.workers > 1 and os.getenv("TOKEN_REVOCATION_BACKEND", "memory") != "redis":
+        parser.error("vários workers precisam de TOKEN_REVOCATION_BACKEND=redis (com REDIS_URL), senão o "
+                     "logout só revoga o token no worker que o atendeu; use --workers 1 para rodar sem redis")
+    # O pool de conexões é lido ao importar o Product.database, então precisa estar no ambiente antes do preload.
+    if args.db_max_connections:
+        try:
+            os.environ.update(pool_settings(args.db_max_connections, args.workers))
+        except ValueError as error:
+            parser.error(str(error))
+    # Cada worker tem o seu pool de hash de senhas; sem configuração, os núcleos são divididos entre eles.
+    os.environ.setdefault("PASSWORD_HASH_WORKERS", str(max(1, (os.cpu_count() or 1) // args.workers)))
+    # O cache de respostas precisa saber se há outros workers (Last-Modified com o backend memory).
+    os.environ["SERVE_WORKERS"] = str(args.workers)
+
+    # Preload: a aplicação é importada e o banco migrado uma única vez, no master.
+    from .main import app
+    from .database import engine
+    from .migrations import migrate
+    from .response_cache import response_cache
+
+    if args.workers > 1 and not response_cache.conditional and response_cache.backend is not None:
+        print("[serve] RESPONSE_CACHE_BACKEND=memory com vários workers: Last-Modified desligado e listas "
+              "guardadas podem ficar desatualizadas por até RESPONSE_CACHE_TTL segundos; use o redis",
+              file=sys.stderr)
+
+    if os.getenv("AUTO_MIGRATE", "true").lower() == "true":
+        migrate(engine)
+        engine.dispose()
+        # Com o esquema já migrado, o lifespan dos workers não precisa conferir a versão de novo.
+        os.environ["AUTO_MIGRATE"] = "false"
+
+    sock = bind_socket(args.host, args.port)
+    Master(app, sock, args).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from .response_cache import REDIS_URL
+
+"""
+Cache em memória de tokens JWT já verificados. Rotas protegidas chamam o get_current_user a cada
+requisição, e verificar a assinatura do token (jwt.decode) custa CPU. Com o cache, um token que já foi
+verificado é aceito direto até expirar (claim "exp"). Os tokens revogados (logout) são recusados mesmo
+que a assinatura ainda seja válida, e a revogação é consultada antes do cache.
+
+O cache dos tokens verificados é de cada processo (um token aceito num worker é só um jwt.decode a mais
+no outro), mas a lista de revogados precisa valer para todos os workers. Backends (TOKEN_REVOCATION_BACKEND):
+- "memory" (padrão): lista dentro do processo; só serve para um único worker (o Product.serve se recusa a
+  subir com mais de um);
+- "redis": compartilhada entre processos/servidores, cada token revogado é uma chave que expira junto com
+  o token (precisa do pacote redis e de REDIS_URL, o mesmo do response_cache);
+- "fake": mesma interface do redis, em memória, para testes.
+"""
+
+# Quantidade máxima de tokens guardados; ao passar disso, o usado há mais tempo é descartado (LRU).
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "10000"))
+TOKEN_REVOCATION_BACKEND = os.getenv("TOKEN_REVOCATION_BACKEND", "memory")
+
+
+def _digest(token: str) -> str:
+    # A chave é o hash do token, para não manter os tokens em texto simples na memória.
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class MemoryRevocations:
+    """Classe que guarda os tokens revogados dentro do processo, cada um até o seu "exp"."""
+
+    def __init__(self):
+        self._revoked = {}  # digest -> expira em
+        self._lock = threading.Lock()
+
+    def is_revoked(self, key: str) -> bool:
+        with self._lock:
+            return key in self._revoked
+
+    def revoke(self, key: str, expires_at: float):
+        now = time.time()
+        with self._lock:
+            # Remove da lista os tokens que já expiraram, para ela não crescer sem limite.
+            for expired in [k for k, exp in self._revoked.items() if exp <= now]:
+                del self._revoked[expired]
+            self._revoked[key] = expires_at
+
+    def count(self) -> int:
+        with self._lock:
+            return len(self._revoked)
+
+
+class RedisRevocations:
+    """Classe que guarda os tokens revogados num redis compartilhado pelos workers.
+
+    O get_current_user é síncrono, por isso o cliente é o redis síncrono (redis.Redis), e não o
+    redis.asyncio usado pelo response_cache e pelo rate_limit.
+
+    Args:
+        client: Cliente redis.Redis (ou o FakeRedis nos testes)
+    """
+
+    PREFIX = "tokens:revoked:"
+
+    def __init__(self, client):
+        self.client = client
+
+    def is_revoked(self, key: str) -> bool:
+        return bool(self.client.exists(self.PREFIX + key))
+
+    def revoke(self, key: str, expires_at: float):
+        # A chave expira junto com o token; depois disso ele já seria recusado pelo jwt.decode.
+        ttl = max(1, math.ceil(expires_at - time.time()))
+        self.client.set(self.PREFIX + key, 1, ex=ttl)
+
+    def count(self):
+        # Contar as chaves exigiria percorrer o redis inteiro (SCAN); a métrica fica de fora.
+        return None
+
+
+class FakeRedis:
+    """Classe que imita os comandos do redis síncrono usados pelo RedisRevocations, guardando tudo em memória."""
+
+    def __init__(self):
+        self._data = {}  # chave -> expira em
+        self._lock = threading.Lock()
+
+    def exists(self, key: str) -> int:
+        with self._lock:
+            expires_at = self._data.get(key)
+            if expires_at is None or expires_at <= time.monotonic():
+                self._data.pop(key, None)
+                return 0
+            return 1
+
+    def set(self, key: str, value, ex: int = None):
+        with self._lock:
+            self._data[key] = time.monotonic() + ex if ex else math.inf
+
+
+class TokenCache:
+    """Classe que guarda os dados de tokens verificados, limitada por tamanho e pelo "exp" de cada token.
+
+    O get_current_user é uma função síncrona (roda no threadpool), por isso o acesso é protegido por lock.
+
+    Args:
+        revocations: MemoryRevocations ou RedisRevocations, onde ficam os tokens revogados
+        max_size (int): Quantidade máxima de tokens no cache
+    """
+
+    def __init__(self, revocations, max_size: int = TOKEN_CACHE_SIZE):
+        self.revocations = revocations
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # digest -> (dados do token, expira em)
+        self._lock = threading.Lock()
+
+    def lookup(self, token: str):
+        """Função que consulta se o token foi revogado e se os dados dele estão no cache, com um único hash.
+
+        Args:
+            token (str): Token JWT
+
+        Returns:
+            tuple: (revogado, dados do token ou None se não estiver no cache ou já tiver expirado)
+        """
+        key = _digest(token)
+        # Fora do lock: com o redis é uma ida à rede.
+        if self.revocations.is_revoked(key):
+            with self._lock:
+                self._entries.pop(key, None)
+            return True, None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[1] <= time.time():
+                self._entries.pop(key, None)
+                self.misses += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return False, entry[0]
+
+    def put(self, token: str, token_data, expires_at: float):
+        """Função que guarda os dados de um token recém-verificado até o seu "exp".
+
+        Args:
+            token (str): Token JWT
+            token_data (TokenData): Dados extraídos do token
+            expires_at (float): Timestamp do claim "exp"
+        """
+        key = _digest(token)
+        with self._lock:
+            self._entries[key] = (token_data, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def revoke(self, token: str, expires_at: float):
+        """Função que revoga um token até o seu "exp"; depois disso ele já seria recusado pelo jwt.decode.
+
+        Args:
+            token (str): Token JWT
+            expires_at (float): Timestamp do claim "exp"
+        """
+        key = _digest(token)
+        self.revocations.revoke(key, expires_at)
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def stats(self) -> dict:
+        """Função que retorna os contadores do cache.
+
+        Returns:
+            dict: Acertos, erros, tamanho atual e quantidade de tokens revogados (None com o redis)
+        """
+        revoked = self.revocations.count()
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses,
+                    "size": len(self._entries), "revoked": revoked}
+
+
+def _create_revocations(name: str):
+    if name == "memory":
+        return MemoryRevocations()
+    if name == "redis":
+        import redis  # dependência opcional, só necessária com TOKEN_REVOCATION_BACKEND=redis
+        return RedisRevocations(redis.Redis.from_url(REDIS_URL))
+    if name == "fake":
+        return RedisRevocations(FakeRedis())
+    raise ValueError(f"TOKEN_REVOCATION_BACKEND inválido: {name!r} (use memory, redis ou fake)")
+
+
+# Instância única compartilhada pelas rotas.
+token_cache = TokenCache(_create_revocations(TOKEN_REVOCATION_BACKEND))
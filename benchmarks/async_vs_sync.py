@@ -0,0 +1,123 @@
+"""
+Benchmark que compara rotas síncronas (def + get_db) com rotas assíncronas (async def + get_async_db).
+
+As duas rotas fazem a mesma consulta (busca de um produto pelo ID com o vendedor). A aplicação roda
+dentro do próprio processo via transporte ASGI do httpx, sem rede, para medir apenas o custo do
+servidor. As rotas síncronas dependem do threadpool (40 threads por padrão no anyio), enquanto as
+assíncronas esperam o banco no event loop.
+
+Uso:
+    python -m benchmarks.async_vs_sync --clients 100 1000 --requests 5000
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+from fastapi import FastAPI, Depends
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+
+
+def build_app():
+    """Função que monta uma aplicação mínima com uma rota síncrona e uma assíncrona equivalentes.
+
+    Returns:
+        FastAPI: Aplicação de benchmark
+    """
+    from Product import models
+    from Product.database import get_db, get_async_db
+
+    app = FastAPI()
+
+    @app.get("/sync/{product_id}")
+    def sync_product(product_id: int, db: Session = Depends(get_db)):
+        product = db.query(models.Product).options(joinedload(models.Product.seller)) \
+            .filter(models.Product.id == product_id).first()
+        return {"name": product.name, "seller": product.seller.username}
+
+    @app.get("/async/{product_id}")
+    async def async_product(product_id: int, db: AsyncSession = Depends(get_async_db)):
+        result = await db.execute(select(models.Product).options(joinedload(models.Product.seller))
+                                  .where(models.Product.id == product_id))
+        product = result.scalars().first()
+        return {"name": product.name, "seller": product.seller.username}
+
+    return app
+
+
+def seed(products: int):
+    """Função que cria as tabelas e insere um vendedor com a quantidade pedida de produtos."""
+    from Product import models
+    from Product.database import engine, SessionLocal
+    from Product.migrations import migrate
+
+    migrate(engine)
+    with SessionLocal() as db:
+        seller = models.Seller(username="bench", email="bench@example.com", password="x")
+        db.add(seller)
+        db.flush()
+        db.add_all([models.Product(name=f"Produto {i}", price=float(i), seller_id=seller.id)
+                    for i in range(products)])
+        db.commit()
+
+
+async def run(app, path: str, clients: int, total: int, products: int):
+    """Função que dispara ``total`` requisições com ``clients`` clientes concorrentes.
+
+    Returns:
+        dict: Vazão (req/s) e latências p50/p99 em milissegundos
+    """
+    latencies = []
+    counter = iter(range(total))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            for i in counter:
+                start = time.perf_counter()
+                response = await client.get(f"/{path}/{i % products + 1}")
+                latencies.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(clients)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=1000)
+    args = parser.parse_args()
+
+    # O banco de dados do benchmark fica numa pasta temporária para não mexer no product.db.
+    os.chdir(tempfile.mkdtemp(prefix="bench-"))
+    seed(args.products)
+    app = build_app()
+
+    # Um único event loop para todas as rodadas: o pool do engine assíncrono fica preso ao loop
+    # em que foi criado.
+    async def run_all():
+        print(f"{'rota':<6} {'clientes':>8} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10}")
+        for clients in args.clients:
+            for path in ("sync", "async"):
+                result = await run(app, path, clients, args.requests, args.products)
+                print(f"{path:<6} {clients:>8} {result['rps']:>10.1f} {result['p50_ms']:>10.2f} {result['p99_ms']:>10.2f}")
+
+    asyncio.run(run_all())
+
+
+if __name__ == "__main__":
+    main()
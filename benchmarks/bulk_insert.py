@@ -0,0 +1,75 @@
+"""
+Benchmark da carga de produtos: rota unitária (addProduct) contra a rota em lote (bulkAddProducts).
+
+A aplicação Product.main:app roda dentro do próprio processo via transporte ASGI do httpx, contra um
+banco SQLite temporário, e o resultado é mostrado em linhas por segundo.
+
+Uso:
+    python -m benchmarks.bulk_insert --rows 100000 --single-rows 2000 --chunk-sizes 500 1000 5000
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+
+
+async def bench_single(client, rows: int) -> float:
+    """Função que insere ``rows`` produtos, um por requisição. Retorna linhas por segundo."""
+    start = time.perf_counter()
+    for i in range(rows):
+        response = await client.post("/api/v1/products/addProduct?seller_id=1",
+                                     json={"name": f"Produto {i}", "price": float(i)})
+        response.raise_for_status()
+    return rows / (time.perf_counter() - start)
+
+
+async def bench_bulk(client, rows: int, chunk_size: int) -> float:
+    """Função que insere ``rows`` produtos numa única requisição NDJSON. Retorna linhas por segundo."""
+    body = "\n".join(json.dumps({"name": f"Produto {i}", "price": float(i)}) for i in range(rows))
+    start = time.perf_counter()
+    response = await client.post(f"/api/v1/products/bulkAddProducts?seller_id=1&chunk_size={chunk_size}",
+                                 content=body, headers={"content-type": "application/x-ndjson"})
+    response.raise_for_status()
+    assert response.json()["inserted"] == rows
+    return rows / (time.perf_counter() - start)
+
+
+async def run(args):
+    from Product.database import engine
+    from Product.main import app
+    from Product.migrations import migrate
+
+    # O transporte ASGI não executa o lifespan da aplicação, então as migrações são aplicadas aqui.
+    migrate(engine)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.post("/api/v1/sellers/addNewSeller",
+                                     json={"username": "bench", "email": "bench@example.com", "password": "bench"})
+        response.raise_for_status()
+
+        print(f"{'rota':<28} {'linhas':>8} {'linhas/s':>12}")
+        rps = await bench_single(client, args.single_rows)
+        print(f"{'addProduct':<28} {args.single_rows:>8} {rps:>12.1f}")
+        for chunk_size in args.chunk_sizes:
+            rps = await bench_bulk(client, args.rows, chunk_size)
+            print(f"{f'bulkAddProducts chunk={chunk_size}':<28} {args.rows:>8} {rps:>12.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--single-rows", type=int, default=2000)
+    parser.add_argument("--chunk-sizes", type=int, nargs="+", default=[500, 1000, 5000])
+    args = parser.parse_args()
+
+    # O banco de dados do benchmark fica numa pasta temporária para não mexer no product.db.
+    os.chdir(tempfile.mkdtemp(prefix="bench-"))
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
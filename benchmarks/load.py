@@ -0,0 +1,216 @@
+"""
+Suíte de carga das duas aplicações (main:app da raiz e Product.main:app).
+
+As aplicações rodam dentro do próprio processo via transporte ASGI do httpx (sem rede), contra um banco
+SQLite temporário com a quantidade de produtos pedida. Cada cenário é executado em cada nível de
+concorrência e o resultado traz latência p50/p95/p99, vazão e o pico de memória (RSS) do processo.
+
+O resultado é gravado em JSON (--output) para comparar execuções entre commits. Com --baseline, a suíte
+compara com um resultado anterior e termina com código 1 se algum cenário piorar mais que --threshold
+(p95 maior ou vazão menor).
+
+Uso:
+    python -m benchmarks.load --products 10000 --concurrency 1 10 50 --requests 500 --output bench.json
+    python -m benchmarks.load --output novo.json --baseline bench.json --threshold 0.15
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+SELLER = {"username": "bench", "email": "bench@example.com", "password": "bench"}
+
+
+def _login(i, ctx):
+    return "POST", "/login", {"data": {"username": SELLER["username"], "password": SELLER["password"]}}
+
+
+def _list_all_products(i, ctx):
+    return "GET", "/api/v1/products/listAllProducts", {"params": {"limit": 100}}
+
+
+def _get_product(i, ctx):
+    return "GET", f"/api/v1/products/getProduct/{ctx['rng'].randint(1, ctx['products'])}", {}
+
+
+def _add_product(i, ctx):
+    return "POST", "/api/v1/products/addProduct", {"params": {"seller_id": 1},
+                                                  "json": {"name": f"Carga {i}", "price": 10.0}}
+
+
+def _movies(i, ctx):
+    return "GET", "/movies", {}
+
+
+def _insert_movie(i, ctx):
+    return "POST", "/insert_movie", {"json": {"name": f"Filme {i}", "year": 2000, "tags": ["Carga"],
+                                              "thumbnail": [{"url": "https://example.com/carga.jpg"}]}}
+
+
+# Cenário -> (aplicação, função que monta a requisição número i)
+SCENARIOS = {
+    "login": ("product", _login),
+    "listAllProducts": ("product", _list_all_products),
+    "getProduct": ("product", _get_product),
+    "addProduct": ("product", _add_product),
+    "movies": ("movies", _movies),
+    "insert_movie": ("movies", _insert_movie),
+}
+
+
+def seed(products: int):
+    """Função que cria as tabelas e insere um vendedor (com senha para o login) e os produtos."""
+    from sqlalchemy import insert
+    from Product import models
+    from Product.database import engine, SessionLocal
+    from Product.hashing import get_pwd_context
+    from Product.migrations import migrate
+
+    migrate(engine)
+    with SessionLocal() as db:
+        db.add(models.Seller(username=SELLER["username"], email=SELLER["email"],
+                             password=get_pwd_context().hash(SELLER["password"])))
+        db.commit()
+        for start in range(0, products, 10000):
+            db.execute(insert(models.Product), [{"name": f"Produto {i}", "price": float(i), "seller_id": 1}
+                                                for i in range(start, min(start + 10000, products))])
+            db.commit()
+
+
+def percentile(values, fraction: float) -> float:
+    return values[max(int(round(len(values) * fraction)) - 1, 0)] * 1000 if values else 0.0
+
+
+async def run_scenario(app, build_request, concurrency: int, requests: int, ctx: dict) -> dict:
+    """Função que executa ``requests`` requisições de um cenário com ``concurrency`` clientes.
+
+    Returns:
+        dict: Latências p50/p95/p99 (ms), vazão (req/s), erros e pico de RSS (MB)
+    """
+    latencies = []
+    errors = 0
+    counter = iter(range(requests))
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                method, url, kwargs = build_request(i, ctx)
+                start = time.perf_counter()
+                response = await client.request(method, url, **kwargs)
+                latencies.append(time.perf_counter() - start)
+                if response.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "errors": errors,
+        # No Linux o ru_maxrss vem em KiB.
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float):
+    """Função que compara o resultado com um resultado anterior.
+
+    Returns:
+        list: Mensagens das regressões encontradas (p95 ou vazão piores que o limite)
+    """
+    regressions = []
+    for scenario, levels in results["results"].items():
+        for level, current in levels.items():
+            previous = baseline.get("results", {}).get(scenario, {}).get(level)
+            if previous is None:
+                continue
+            if current["p95_ms"] > previous["p95_ms"] * (1 + threshold):
+                regressions.append(f"{scenario} c={level}: p95 {previous['p95_ms']} -> {current['p95_ms']} ms")
+            if current["throughput_rps"] < previous["throughput_rps"] * (1 - threshold):
+                regressions.append(f"{scenario} c={level}: vazão {previous['throughput_rps']} -> "
+                                   f"{current['throughput_rps']} req/s")
+    return regressions
+
+
+def _git_commit(path: str) -> str:
+    try:
+        return subprocess.run(["git", "-C", path, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "desconhecido"
+
+
+async def run_all(args, apps: dict) -> dict:
+    ctx = {"products": args.products, "rng": random.Random(42)}
+    results = {}
+    print(f"{'cenário':<16} {'conc.':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'erros':>6} {'RSS MB':>8}")
+    for name in args.scenarios:
+        app_name, build_request = SCENARIOS[name]
+        results[name] = {}
+        for concurrency in args.concurrency:
+            r = await run_scenario(apps[app_name], build_request, concurrency, args.requests, ctx)
+            results[name][str(concurrency)] = r
+            print(f"{name:<16} {concurrency:>5} {r['p50_ms']:>9.2f} {r['p95_ms']:>9.2f} {r['p99_ms']:>9.2f} "
+                  f"{r['throughput_rps']:>9.1f} {r['errors']:>6} {r['peak_rss_mb']:>8.1f}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10000, help="Produtos no banco semeado")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--requests", type=int, default=500, help="Requisições por cenário e nível")
+    parser.add_argument("--scenarios", nargs="+", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--output", help="Arquivo JSON onde o resultado é gravado")
+    parser.add_argument("--baseline", help="Resultado anterior (JSON) para a verificação de regressão")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Piora tolerada (0.10 = 10%%)")
+    args = parser.parse_args()
+
+    repo = os.getcwd()
+    # O cenário de login repete o mesmo usuário a partir do mesmo IP, então o limite de tentativas é
+    # desligado (a menos que RATE_LIMIT_BACKEND seja informado) para medir a rota e não o 429.
+    os.environ.setdefault("RATE_LIMIT_BACKEND", "none")
+    # O banco de dados do benchmark fica numa pasta temporária para não mexer no product.db.
+    os.chdir(tempfile.mkdtemp(prefix="bench-"))
+    seed(args.products)
+
+    import main as movies_main
+    from Product.main import app as product_app
+
+    results = {
+        "meta": {"commit": _git_commit(repo), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                 "products": args.products, "requests": args.requests, "python": sys.version.split()[0]},
+        "results": asyncio.run(run_all(args, {"product": product_app, "movies": movies_main.app})),
+    }
+
+    if args.output:
+        with open(os.path.join(repo, args.output), "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(os.path.join(repo, args.baseline), encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.threshold)
+        if regressions:
+            print("Regressões acima de {:.0%}:".format(args.threshold))
+            for regression in regressions:
+                print("  " + regression)
+            sys.exit(1)
+        print("Nenhuma regressão acima de {:.0%}.".format(args.threshold))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Microbenchmark do custo de serialização da lista de produtos, por 10 mil produtos (padrão).
+
+Compara os caminhos de list_all_products:
+- orm+jsonable_encoder: objetos do ORM validados pelo DisplayProduct e codificados como o FastAPI faz
+  por padrão (jsonable_encoder + json.dumps);
+- orm+TypeAdapter: objetos do ORM validados e serializados direto para bytes pelo Pydantic;
+- rows+orjson: consulta só com as colunas da saída, tuplas serializadas com o orjson (PRODUCT_FAST_JSON).
+
+Cada caminho é medido com a consulta incluída (consulta + serialização) e só a serialização.
+
+Uso:
+    python -m benchmarks.serialization --products 10000 --repeat 5
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from sqlalchemy.orm import joinedload
+
+
+def seed(products: int):
+    """Função que cria as tabelas e insere um vendedor com a quantidade pedida de produtos."""
+    from Product import models
+    from Product.database import engine, SessionLocal
+    from Product.migrations import migrate
+
+    migrate(engine)
+    with SessionLocal() as db:
+        seller = models.Seller(username="bench", email="bench@example.com", password="x")
+        db.add(seller)
+        db.flush()
+        db.add_all([models.Product(name=f"Produto {i}", price=float(i), description="Descrição do produto",
+                                   seller_id=seller.id) for i in range(products)])
+        db.commit()
+
+
+def best_of(repeat: int, func) -> float:
+    """Função que executa ``func`` ``repeat`` vezes e retorna o menor tempo, em milissegundos."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    # O banco de dados do benchmark fica numa pasta temporária para não mexer no product.db.
+    os.chdir(tempfile.mkdtemp(prefix="bench-"))
+    seed(args.products)
+
+    from Product import models, schemas
+    from Product.database import SessionLocal
+    from Product.serializers import product_rows_query, serialize_product_rows
+
+    adapter = TypeAdapter(List[schemas.DisplayProduct])
+
+    def load_orm():
+        with SessionLocal() as db:
+            return db.query(models.Product).options(joinedload(models.Product.seller)).all()
+
+    def load_rows():
+        with SessionLocal() as db:
+            return db.execute(product_rows_query()).all()
+
+    def encode_default(products):
+        return json.dumps(jsonable_encoder([schemas.DisplayProduct.model_validate(p) for p in products])).encode()
+
+    def encode_adapter(products):
+        return adapter.dump_json(adapter.validate_python(products, from_attributes=True))
+
+    paths = [
+        ("orm+jsonable_encoder", load_orm, encode_default),
+        ("orm+TypeAdapter", load_orm, encode_adapter),
+        ("rows+orjson", load_rows, serialize_product_rows),
+    ]
+
+    print(f"{args.products} produtos, melhor de {args.repeat} execuções")
+    print(f"{'caminho':<22} {'consulta+serial. ms':>20} {'só serialização ms':>20}")
+    for name, load, encode in paths:
+        total = best_of(args.repeat, lambda: encode(load()))
+        data = load()
+        only_encode = best_of(args.repeat, lambda: encode(data))
+        print(f"{name:<22} {total:>20.1f} {only_encode:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Benchmark de carga mista (leituras e escritas) comparando os perfis do SQLite (SQLITE_PROFILE).
+
+Para cada perfil é iniciado um processo novo (os PRAGMAs são lidos na importação do Product.database),
+que roda Product.main:app dentro do próprio processo via transporte ASGI do httpx, contra um banco
+SQLite temporário. Os clientes fazem getProduct (leitura) e addProduct (escrita) na proporção pedida.
+
+Uso:
+    python -m benchmarks.sqlite_profile --clients 50 --requests 5000 --write-ratio 0.2
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+PROFILES = ["default", "production"]
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[max(int(len(values) * fraction) - 1, 0)] * 1000 if values else 0.0
+
+
+async def run(args):
+    """Função que executa a carga mista e retorna vazão e latências de leitura e escrita."""
+    from Product.database import engine
+    from Product.main import app
+    from Product.migrations import migrate
+
+    # O transporte ASGI não executa o lifespan da aplicação, então as migrações são aplicadas aqui.
+    migrate(engine)
+
+    reads, writes = [], []
+    counter = iter(range(args.requests))
+    rng = random.Random(42)
+
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        response = await client.post("/api/v1/sellers/addNewSeller",
+                                     json={"username": "bench", "email": "bench@example.com", "password": "bench"})
+        response.raise_for_status()
+        body = "\n".join(json.dumps({"name": f"Produto {i}", "price": float(i)}) for i in range(args.products))
+        response = await client.post("/api/v1/products/bulkAddProducts?seller_id=1", content=body,
+                                     headers={"content-type": "application/x-ndjson"})
+        response.raise_for_status()
+
+        async def worker():
+            for i in counter:
+                start = time.perf_counter()
+                if rng.random() < args.write_ratio:
+                    response = await client.post("/api/v1/products/addProduct?seller_id=1",
+                                                 json={"name": f"Novo {i}", "price": 1.0})
+                    writes.append(time.perf_counter() - start)
+                else:
+                    response = await client.get(f"/api/v1/products/getProduct/{rng.randint(1, args.products)}")
+                    reads.append(time.perf_counter() - start)
+                response.raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(args.clients)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "rps": args.requests / elapsed,
+        "read_p50_ms": percentile(reads, 0.50), "read_p99_ms": percentile(reads, 0.99),
+        "write_p50_ms": percentile(writes, 0.50), "write_p99_ms": percentile(writes, 0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--products", type=int, default=10000)
+    parser.add_argument("--write-ratio", type=float, default=0.2)
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        # O banco de dados do benchmark fica numa pasta temporária para não mexer no product.db.
+        os.chdir(tempfile.mkdtemp(prefix="bench-"))
+        print(json.dumps(asyncio.run(run(args))))
+        return
+
+    print(f"{'perfil':<12} {'req/s':>8} {'leit p50':>9} {'leit p99':>9} {'escr p50':>9} {'escr p99':>9}")
+    for profile in PROFILES:
+        output = subprocess.run([sys.executable, "-m", "benchmarks.sqlite_profile", "--worker", *sys.argv[1:]],
+                                env={**os.environ, "SQLITE_PROFILE": profile},
+                                check=True, capture_output=True, text=True).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f"{profile:<12} {r['rps']:>8.1f} {r['read_p50_ms']:>9.2f} {r['read_p99_ms']:>9.2f} "
+              f"{r['write_p50_ms']:>9.2f} {r['write_p99_ms']:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
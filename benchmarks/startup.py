@@ -0,0 +1,92 @@
+"""
+Medição do tempo de subida (cold start) de um worker do Product.main:app.
+
+Cada execução é um processo Python novo, que mede:
+- import: tempo para importar Product.main (o que todo worker paga antes de atender);
+- lifespan: tempo do lifespan da aplicação (conferência/aplicação das migrações);
+- primeira requisição: tempo da primeira resposta de /api/v1/products/listAllProducts.
+
+A primeira execução usa um banco vazio (aplica as migrações); as demais, o banco já migrado. Com
+--importtime, mostra também os módulos mais lentos de importar (python -X importtime).
+
+Uso:
+    python -m benchmarks.startup --runs 5 --importtime
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+# Código executado em cada processo novo; imprime os tempos em JSON na última linha.
+CHILD = r"""
+import asyncio, json, time
+start = time.perf_counter()
+from Product.main import app
+imported = time.perf_counter()
+
+import httpx
+
+async def run():
+    async with app.router.lifespan_context(app):
+        ready = time.perf_counter()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            response = await client.get("/api/v1/products/listAllProducts")
+            response.raise_for_status()
+        return ready, time.perf_counter()
+
+ready, first = asyncio.run(run())
+print(json.dumps({"import_ms": (imported - start) * 1000, "lifespan_ms": (ready - imported) * 1000,
+                  "first_request_ms": (first - ready) * 1000, "total_ms": (first - start) * 1000}))
+"""
+
+
+def run_child(repo: str, workdir: str, extra_args=()) -> subprocess.CompletedProcess:
+    env = {**os.environ, "PYTHONPATH": repo + os.pathsep + os.environ.get("PYTHONPATH", "")}
+    return subprocess.run([sys.executable, *extra_args, "-c", CHILD], cwd=workdir, env=env,
+                          capture_output=True, text=True, check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--importtime", action="store_true", help="Mostra os módulos mais lentos de importar")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    repo = os.getcwd()
+    # O banco de dados do benchmark fica numa pasta temporária para não mexer no product.db.
+    workdir = tempfile.mkdtemp(prefix="bench-")
+
+    print(f"{'execução':<14} {'import ms':>10} {'lifespan ms':>12} {'1ª req. ms':>11} {'total ms':>9}")
+    warm = []
+    for run in range(args.runs + 1):
+        result = json.loads(run_child(repo, workdir).stdout.strip().splitlines()[-1])
+        label = "banco vazio" if run == 0 else f"migrado #{run}"
+        if run:
+            warm.append(result)
+        print(f"{label:<14} {result['import_ms']:>10.1f} {result['lifespan_ms']:>12.1f} "
+              f"{result['first_request_ms']:>11.1f} {result['total_ms']:>9.1f}")
+
+    if warm:
+        print(f"{'mediana':<14} " + " ".join(
+            f"{statistics.median(r[key] for r in warm):>{width}.1f}"
+            for key, width in (("import_ms", 10), ("lifespan_ms", 12), ("first_request_ms", 11), ("total_ms", 9))))
+
+    if args.importtime:
+        # O -X importtime escreve no stderr: "import time: self [us] | cumulative | módulo".
+        stderr = run_child(repo, workdir, ("-X", "importtime")).stderr
+        rows = []
+        for line in stderr.splitlines():
+            parts = line.split("|")
+            if line.startswith("import time:") and parts[1].strip().isdigit():
+                rows.append((int(parts[1]), parts[2].rstrip()))
+        print("\nMódulos mais lentos (tempo acumulado):")
+        for cumulative, module in sorted(rows, reverse=True)[:args.top]:
+            print(f"{cumulative / 1000:>10.1f} ms {module}")
+
+
+if __name__ == "__main__":
+    main()
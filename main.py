@@ -1,7 +1,14 @@
-from fastapi import FastAPI, Form
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Form, Query, Request, Response
 from pydantic import BaseModel, Field, HttpUrl
-from typing import Set, List
+from typing import Set, List, Optional
 from datetime import datetime
+from movie_store import MovieStore, JsonSnapshotBackend, FIELDS
+from write_behind import WriteBehindQueue
+from Product.http_cache import CompressionMiddleware, is_not_modified, last_modified_headers
+from Product.change_feed import movie_changes
 
 # A documentação do FastAPI é gerada automaticamente
 # e pode ser acessada em http://localhost:8000/docs
@@ -58,43 +65,85 @@ class Movie(BaseModel):
         }
 
 
-# Dicionário de filmes para simular um banco de dados
-dict_movies = {
-    1: {'name': 'Back to The Future', 
-        'year': 1985, 
-        'tags': ['Sci-Fi', 'Adventure'], 
-        'thumbnail': [Thumbnail(url='https://example.com/back_to_the_future.jpg'), 
-                      Thumbnail(url='https://example.com/back_to_the_future2.jpg')],
-        'created_at': datetime(2023, 10, 1, 12, 0, 0)},
-    2: {'name': 'Cars', 
-        'year': 2006, 
-        'tags': ['Animation', 'Family'], 
-        'thumbnail': Thumbnail(url='https://example.com/cars.jpg'),
-        'created_at': datetime(2023, 10, 1, 12, 0, 2)},
-    3: {'name': 'Transformers', 
-        'year': 2007, 
-        'tags': ['Action', 'Sci-Fi'], 
-        'thumbnail': Thumbnail(url='https://example.com/transformers.jpg'),
-        'created_at': datetime(2023, 10, 1, 12, 0, 5)},
-    4: {'name': 'The Matrix', 
-        'year': 1999, 
-        'tags': ['Sci-Fi', 'Action'], 
-        'thumbnail': Thumbnail(url='https://example.com/the_matrix.jpg'),
-        'created_at': datetime(2023, 10, 1, 12, 0, 9)},
-    5: {'name': 'The Lord of the Rings', 
-        'year': 2001, 
-        'tags': ['Fantasy', 'Adventure'], 
-        'thumbnail': Thumbnail(url='https://example.com/lord_of_the_rings.jpg'),
-        'created_at': datetime(2023, 10, 1, 12, 0, 11)},
-    6: {'name': 'Mickey 17', 
-        'year': 2025, 
-        'tags': ['Sci-Fi', 'Adventure'], 
-        'thumbnail': Thumbnail(url='https://example.com/mickey_17.jpg'),
-        'created_at': datetime(2023, 10, 1, 12, 0, 16)}
-}
-
-
-app = FastAPI()
+# Filmes cadastrados ao subir a aplicação, para simular um banco de dados
+SEED_MOVIES = [
+    {'name': 'Back to The Future', 
+     'year': 1985, 
+     'tags': ['Sci-Fi', 'Adventure'], 
+     'thumbnail': ['https://example.com/back_to_the_future.jpg', 
+                   'https://example.com/back_to_the_future2.jpg'],
+     'created_at': datetime(2023, 10, 1, 12, 0, 0)},
+    {'name': 'Cars', 
+     'year': 2006, 
+     'tags': ['Animation', 'Family'], 
+     'thumbnail': ['https://example.com/cars.jpg'],
+     'created_at': datetime(2023, 10, 1, 12, 0, 2)},
+    {'name': 'Transformers', 
+     'year': 2007, 
+     'tags': ['Action', 'Sci-Fi'], 
+     'thumbnail': ['https://example.com/transformers.jpg'],
+     'created_at': datetime(2023, 10, 1, 12, 0, 5)},
+    {'name': 'The Matrix', 
+     'year': 1999, 
+     'tags': ['Sci-Fi', 'Action'], 
+     'thumbnail': ['https://example.com/the_matrix.jpg'],
+     'created_at': datetime(2023, 10, 1, 12, 0, 9)},
+    {'name': 'The Lord of the Rings', 
+     'year': 2001, 
+     'tags': ['Fantasy', 'Adventure'], 
+     'thumbnail': ['https://example.com/lord_of_the_rings.jpg'],
+     'created_at': datetime(2023, 10, 1, 12, 0, 11)},
+    {'name': 'Mickey 17', 
+     'year': 2025, 
+     'tags': ['Sci-Fi', 'Adventure'], 
+     'thumbnail': ['https://example.com/mickey_17.jpg'],
+     'created_at': datetime(2023, 10, 1, 12, 0, 16)}
+]
+
+# Store de filmes com índices por tag e por ano. Se a variável de ambiente MOVIE_STORE_SNAPSHOT
+# apontar para um arquivo, os filmes são salvos nele e recarregados ao reiniciar a aplicação.
+# A gravação é feita em segundo plano, agrupada (veja write_behind.py), a menos que
+# MOVIE_STORE_WRITE_BEHIND=false, quando cada alteração grava o snapshot antes de responder.
+snapshot_path = os.getenv("MOVIE_STORE_SNAPSHOT")
+write_behind = bool(snapshot_path) and os.getenv("MOVIE_STORE_WRITE_BEHIND", "true").lower() == "true"
+movie_store = MovieStore(JsonSnapshotBackend(snapshot_path) if snapshot_path else None, autosave=not write_behind)
+if not movie_store.loaded_from_snapshot:
+    for seed_movie in SEED_MOVIES:
+        movie_store.insert(**seed_movie)
+    if write_behind:
+        movie_store.save()
+
+# A fila só controla quando o snapshot é salvo: cada gravação reescreve o snapshot inteiro, mas todas as
+# alterações acumuladas no intervalo viram uma única gravação.
+movie_writes = WriteBehindQueue(movie_store.save) if write_behind else None
+
+
+async def store_write(function, *args, **kwargs):
+    """Executa uma alteração do store sem travar o event loop.
+
+    Sem a fila de gravação (MOVIE_STORE_WRITE_BEHIND=false), o store grava o snapshot em disco, com fsync,
+    dentro da própria alteração; nesse caso ela roda numa thread (o store é protegido por lock). Com a
+    fila, ou sem snapshot, a alteração é só em memória e roda direto.
+    """
+    if movie_store.autosave:
+        return await asyncio.to_thread(function, *args, **kwargs)
+    return function(*args, **kwargs)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Inicia a fila de gravação ao subir e, ao desligar, grava as alterações pendentes antes de sair."""
+    if movie_writes:
+        movie_writes.start()
+    yield
+    if movie_writes:
+        await movie_writes.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Comprime as respostas grandes (ex: a listagem de filmes) no formato aceito pelo cliente.
+app.add_middleware(CompressionMiddleware)
 
 
 ## Criação de endpoints para executar funções no fast api
@@ -104,27 +153,86 @@ def index():
     return 'Hello, World!'
 
 @app.get("/movies")
-def get_movies(id: int = 0):
-    """Retorna as informações com os filmes. Passando o ID do filme igual a 0, retorna todos os filmes.
+def get_movies(request: Request,
+               id: int = 0, 
+               tag: Optional[str] = None, 
+               year_from: Optional[int] = None, 
+               year_to: Optional[int] = None,
+               after: Optional[int] = None,
+               offset: int = Query(0, ge=0),
+               limit: int = Query(100, ge=1, le=1000),
+               fields: Optional[str] = None):
+    """Retorna as informações com os filmes. Passando o ID do filme igual a 0, retorna os filmes paginados,
+    que podem ser filtrados por tag e por faixa de anos (usando os índices do store, sem percorrer todos).
+
+    O JSON de cada filme já fica pronto no store, então a resposta só junta os bytes de cada filme.
+    O Last-Modified é a data da última alteração de qualquer filme; com If-Modified-Since igual ou
+    posterior, a resposta é 304 sem corpo.
     
     Args:
         id (int): ID do filme desejado
+        tag (str): Tag dos filmes, como gênero ou tema
+        year_from (int): Ano inicial dos filmes (inclusive)
+        year_to (int): Ano final dos filmes (inclusive)
+        after (int): Cursor, ID do último filme da página anterior (vem no cabeçalho X-Next-Cursor)
+        offset (int): Quantidade de filmes pulados
+        limit (int): Quantidade máxima de filmes na página
+        fields (str): Campos desejados separados por vírgula, ex: name,year
 
     Returns:
         dict: Informações do filme ou mensagem de erro
 
     Example:
         /movies?id=1
+        /movies?tag=Sci-Fi&year_from=1980&year_to=1989&fields=name,year
+        /movies?limit=2&after=2
     
     """
-    if id == 0:
-        return dict_movies
-    
-    return dict_movies.get(id, {'error': 'Movie not found'})
+    selected = fields.split(',') if fields else None
+    if selected and any(field not in FIELDS for field in selected):
+        return {'error': 'Campo inválido. Campos disponíveis: ' + ', '.join(FIELDS)}
+
+    modified_at = movie_store.modified_at
+    if is_not_modified(request.headers, modified_at):
+        return Response(status_code=304, headers=last_modified_headers(modified_at))
+    headers = last_modified_headers(modified_at)
+
+    if id != 0:
+        movie = movie_store.get(id)
+        if movie is None:
+            return {'error': 'Movie not found'}
+        return Response(content=movie.encode(selected), media_type='application/json', headers=headers)
+
+    movies, next_cursor = movie_store.find(tag, year_from, year_to, after=after, offset=offset, limit=limit)
+    body = b'{' + b','.join(b'"%d":' % movie.id + movie.encode(selected) for movie in movies) + b'}'
+    if next_cursor is not None:
+        headers['X-Next-Cursor'] = str(next_cursor)
+    return Response(content=body, media_type='application/json', headers=headers)
+
+@app.get("/movies/changes")
+async def movies_changes(request: Request,
+                         since: Optional[int] = Query(None, description="Último número de evento recebido")):
+    """Envia as alterações de filmes em Server-Sent Events (text/event-stream), em vez de baixar o /movies
+    de tempos em tempos.
+
+    Os eventos são "create" (filme inserido), "thumbnail" (miniatura adicionada) e "reset" (eventos
+    perdidos; baixe o /movies de novo e continue a partir do número do reset).
+
+    Args:
+        since (int): Último número recebido; sem ele, usa o cabeçalho Last-Event-ID e, sem os dois,
+            envia só as alterações a partir de agora
+
+    Example:
+        /movies/changes?since=1718000000123
+    """
+    return movie_changes.response(request, since)
 
 @app.post("/insert_movie")
-def insert_movie(movie: Movie):
+async def insert_movie(movie: Movie):
     """Insere um novo filme no dicionário de filmes.
+
+    A rota é async def: com a fila de gravação, a alteração do store é só em memória e a gravação em
+    disco fica para depois; sem ela, a alteração (com a gravação) roda numa thread (veja store_write).
     
     Args:
         movie (Movie): Objeto do tipo Movie contendo as informações do filme
@@ -142,26 +250,36 @@ def insert_movie(movie: Movie):
         }
     """
 
-    new_id = len(dict_movies) + 1
-    dict_movies[new_id] = movie.model_dump()
-    dict_movies[new_id]['created_at'] = datetime.now()
-    dict_movies[new_id]['modified_at'] = None  # Inicialmente, não há modificação
+    # O store gera o ID e grava o filme de forma atômica (protegido por lock). Os campos são lidos
+    # direto do modelo já validado, sem o model_dump().
+    new_movie = await store_write(movie_store.insert,
+                                  name=movie.name,
+                                  year=movie.year,
+                                  tags=movie.tags,
+                                  thumbnail=[thumb.url for thumb in movie.thumbnail])
+    if movie_writes:
+        movie_writes.enqueue(new_movie.id, 'insert')
+    movie_changes.publish('create', {'id': new_movie.id,
+                                     'name': new_movie.name,
+                                     'year': new_movie.year,
+                                     'tags': sorted(new_movie.tags),
+                                     'thumbnail': list(new_movie.thumbnail)})
 
     # Retorna uma mensagem de sucesso com o ID do novo filme    
     return {'message': 'Filme cadastrado com sucesso', 
-            'id': new_id,
-            'name': dict_movies[new_id].get('name'),
-            'year': dict_movies[new_id].get('year'),
-            'tags': dict_movies[new_id].get('tags'),
-            'thumbnail': [thumb.get('url', 'Não informado') for thumb in dict_movies[new_id].get('thumbnail', [])],
-            'created_at': dict_movies[new_id].get('created_at').isoformat() if dict_movies[new_id].get('created_at') else 'Não informado',
-            'modified_at': dict_movies[new_id].get('modified_at').isoformat() if dict_movies[new_id].get('modified_at') else 'Não informado'
+            'id': new_movie.id,
+            'name': new_movie.name,
+            'year': new_movie.year,
+            'tags': sorted(new_movie.tags),
+            'thumbnail': list(new_movie.thumbnail),
+            'created_at': new_movie.created_at.isoformat() if new_movie.created_at else 'Não informado',
+            'modified_at': new_movie.modified_at.isoformat() if new_movie.modified_at else 'Não informado'
             }
 
 
 @app.post("/insert_thumbnail")
-def insert_thumbnail(id: int = Form(...), 
-                     url: HttpUrl = Form(...)):
+async def insert_thumbnail(id: int = Form(...), 
+                           url: HttpUrl = Form(...)):
     """Insere uma nova miniatura para um filme existente.
     
     Args:
@@ -174,19 +292,14 @@ def insert_thumbnail(id: int = Form(...),
     Example:
         /insert_thumbnail?id=1&url=https://example.com/new_thumbnail.jpg
     """
-    if id not in dict_movies:
-        return {'error': 'Movie not found'}
-    
     new_thumbnail = Thumbnail(url=url)
 
-    if isinstance(dict_movies[id]['thumbnail'], list):
-        # Se for uma lista, adiciona a lista já existente
-        dict_movies[id]['thumbnail'].append(new_thumbnail)
-    else:
-        # Se não, vai ser uma nova lista
-        dict_movies[id]['thumbnail'] = [dict_movies[id]['thumbnail'], new_thumbnail]
-    
-    dict_movies[id]['modified_at'] = datetime.now()
+    movie = await store_write(movie_store.add_thumbnail, id, new_thumbnail.url)
+    if movie is None:
+        return {'error': 'Movie not found'}
+    if movie_writes:
+        movie_writes.enqueue(id, 'thumbnail')
+    movie_changes.publish('thumbnail', {'id': id, 'thumbnail_url': str(new_thumbnail.url)})
     
     return {'message': 'Miniatura adicionada com sucesso', 
             'movie_id': id, 
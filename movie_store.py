@@ -0,0 +1,267 @@
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime
+
+"""
+Armazenamento em memória dos filmes usados pelo main.py da raiz.
+
+Cada filme é um MovieRecord (com __slots__, sem o __dict__ por objeto) e o store mantém índices
+secundários por tag e por ano, assim uma consulta como "todos os Sci-Fi dos anos 80" só olha os filmes
+candidatos, sem percorrer todos. A geração dos IDs e as alterações são protegidas por um lock, já que
+as rotas síncronas do FastAPI rodam em várias threads ao mesmo tempo.
+
+Cada filme guarda também o seu JSON já codificado (campo a campo), refeito só quando o filme muda. Assim
+as listagens apenas concatenam bytes prontos, sem codificar tudo de novo a cada requisição.
+
+Opcionalmente o store grava um snapshot em JSON (JsonSnapshotBackend) a cada alteração e, ao iniciar,
+carrega o último snapshot em vez de refazer os cadastros. Com autosave=False a gravação fica por conta de
+quem chama save(), como a fila de gravação em segundo plano (write_behind.py) do main.py.
+"""
+
+
+# Campos de saída de cada filme, na ordem em que aparecem no JSON.
+FIELDS = ('name', 'year', 'tags', 'thumbnail', 'created_at', 'modified_at')
+
+
+def _encode_value(value) -> bytes:
+    # Mesmo formato que o FastAPI usaria: datas em ISO 8601 e JSON compacto em UTF-8.
+    return json.dumps(value, default=datetime.isoformat, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class MovieRecord:
+    """Classe que representa um filme cadastrado."""
+
+    __slots__ = ("id", "name", "year", "tags", "thumbnail", "created_at", "modified_at", "_fragments", "_json")
+
+    def __init__(self, id: int, name: str, year: int, tags, thumbnail, created_at: datetime,
+                 modified_at: datetime = None):
+        self.id = id
+        self.name = name
+        self.year = year
+        self.tags = frozenset(tags)
+        self.thumbnail = [str(url) for url in thumbnail]  # sempre uma lista de URLs
+        self.created_at = created_at
+        self.modified_at = modified_at
+        self.refresh_encoding()
+
+    def refresh_encoding(self):
+        """Função que refaz o JSON guardado do filme; deve ser chamada sempre que o filme mudar."""
+        self._fragments = {field: _encode_value(field) + b':' + _encode_value(value)
+                           for field, value in self.to_dict().items()}
+        self._json = b'{' + b','.join(self._fragments.values()) + b'}'
+
+    def encode(self, fields=None) -> bytes:
+        """Função que retorna o JSON do filme já codificado.
+
+        Args:
+            fields (list, optional): Campos desejados (projeção). Defaults to None (todos).
+
+        Returns:
+            bytes: JSON do filme
+        """
+        if fields is None:
+            return self._json
+        return b'{' + b','.join(self._fragments[field] for field in fields) + b'}'
+
+    def to_dict(self) -> dict:
+        """Função que monta o dicionário de saída do filme (mesmo formato do modelo Movie)."""
+        return {'name': self.name,
+                'year': self.year,
+                'tags': sorted(self.tags),
+                'thumbnail': [{'url': url} for url in self.thumbnail],
+                'created_at': self.created_at,
+                'modified_at': self.modified_at}
+
+    def to_snapshot(self) -> dict:
+        return {'id': self.id, **self.to_dict(),
+                'thumbnail': self.thumbnail,
+                'created_at': self.created_at.isoformat(),
+                'modified_at': self.modified_at.isoformat() if self.modified_at else None}
+
+    @classmethod
+    def from_snapshot(cls, data: dict) -> "MovieRecord":
+        return cls(data['id'], data['name'], data['year'], data['tags'], data['thumbnail'],
+                   datetime.fromisoformat(data['created_at']),
+                   datetime.fromisoformat(data['modified_at']) if data['modified_at'] else None)
+
+
+class JsonSnapshotBackend:
+    """Classe que salva e carrega o estado do store num arquivo JSON.
+
+    A gravação é feita num arquivo temporário, enviada ao disco (fsync) e depois renomeada (os.replace),
+    assim uma queda no meio da gravação nunca deixa um snapshot corrompido.
+
+    Args:
+        path (str): Caminho do arquivo de snapshot
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def load(self):
+        """Função que lê o snapshot.
+
+        Returns:
+            tuple: (lista de MovieRecord, próximo ID), ou None se ainda não existir snapshot
+        """
+        if not os.path.exists(self.path):
+            return None
+        with open(self.path, encoding="utf-8") as file:
+            data = json.load(file)
+        return [MovieRecord.from_snapshot(item) for item in data['movies']], data['next_id']
+
+    def save(self, movies: list, next_id: int):
+        """Função que grava o snapshot com todos os filmes (já em dicionários, ver to_snapshot) e o próximo ID."""
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as file:
+            json.dump({'next_id': next_id, 'movies': movies}, file)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self.path)
+
+
+class MovieStore:
+    """Classe que guarda os filmes com índices por tag e por ano.
+
+    Args:
+        snapshot (JsonSnapshotBackend, optional): Backend de persistência. Defaults to None.
+        autosave (bool, optional): Grava o snapshot a cada alteração. Defaults to True.
+    """
+
+    def __init__(self, snapshot: JsonSnapshotBackend = None, autosave: bool = True):
+        self._lock = threading.RLock()
+        self._save_lock = threading.Lock()  # uma gravação por vez, na ordem em que os estados foram lidos
+        self._movies = {}  # id -> MovieRecord
+        self._by_tag = {}  # tag -> set de ids
+        self._by_year = {}  # ano -> set de ids
+        self._years = []  # anos existentes, em ordem, para buscar faixas de ano com bisect
+        self._ids = []  # ids em ordem crescente, para a paginação por cursor
+        self._next_id = 1
+        self._snapshot = snapshot
+        self._autosave = autosave
+        # Contador de alterações do catálogo e data (time.time()) da última, para o Last-Modified.
+        self.version = 0
+        self.modified_at = time.time()
+
+        loaded = snapshot.load() if snapshot else None
+        if loaded:
+            records, self._next_id = loaded
+            for record in records:
+                self._index(record)
+
+    @property
+    def loaded_from_snapshot(self) -> bool:
+        return bool(self._movies)
+
+    @property
+    def autosave(self) -> bool:
+        """Indica se cada alteração grava o snapshot em disco antes de retornar."""
+        return bool(self._snapshot) and self._autosave
+
+    def _index(self, record: MovieRecord):
+        self._movies[record.id] = record
+        self._ids.append(record.id)
+        for tag in record.tags:
+            self._by_tag.setdefault(tag, set()).add(record.id)
+        if record.year not in self._by_year:
+            bisect.insort(self._years, record.year)
+        self._by_year.setdefault(record.year, set()).add(record.id)
+
+    def _touch(self):
+        self.version += 1
+        self.modified_at = time.time()
+
+    def _save(self):
+        if self._autosave:
+            self.save()
+
+    def save(self):
+        """Função que grava o snapshot com o estado atual do store (se houver backend).
+
+        O estado é copiado com o lock do store, mas a escrita em disco acontece fora dele, então as
+        alterações e consultas não esperam o disco.
+        """
+        if not self._snapshot:
+            return
+        with self._save_lock:
+            with self._lock:
+                movies = [record.to_snapshot() for record in self._movies.values()]
+                next_id = self._next_id
+            self._snapshot.save(movies, next_id)
+
+    def insert(self, name: str, year: int, tags, thumbnail, created_at: datetime = None) -> MovieRecord:
+        """Função que cadastra um filme com um novo ID.
+
+        Returns:
+            MovieRecord: Filme cadastrado
+        """
+        with self._lock:
+            record = MovieRecord(self._next_id, name, year, tags, thumbnail, created_at or datetime.now())
+            self._next_id += 1
+            self._index(record)
+            self._touch()
+        # Fora do lock: o save() pega o _save_lock e depois o _lock, sempre nessa ordem.
+        self._save()
+        return record
+
+    def add_thumbnail(self, id: int, url: str):
+        """Função que adiciona uma miniatura a um filme existente.
+
+        Returns:
+            MovieRecord: Filme alterado, ou None se não existir
+        """
+        with self._lock:
+            record = self._movies.get(id)
+            if record is None:
+                return None
+            record.thumbnail.append(str(url))
+            record.modified_at = datetime.now()
+            record.refresh_encoding()
+            self._touch()
+        self._save()
+        return record
+
+    def get(self, id: int):
+        """Função que retorna o filme pelo ID, ou None se não existir."""
+        return self._movies.get(id)
+
+    def __contains__(self, id: int) -> bool:
+        return id in self._movies
+
+    def __len__(self) -> int:
+        return len(self._movies)
+
+    def find(self, tag: str = None, year_from: int = None, year_to: int = None,
+             after: int = None, offset: int = 0, limit: int = None):
+        """Função que busca filmes pela tag e/ou faixa de anos usando os índices, com paginação.
+
+        Args:
+            tag (str, optional): Tag do filme. Defaults to None.
+            year_from (int, optional): Ano inicial (inclusive). Defaults to None.
+            year_to (int, optional): Ano final (inclusive). Defaults to None.
+            after (int, optional): Cursor, ID do último filme da página anterior. Defaults to None.
+            offset (int, optional): Quantidade de filmes pulados (depois do cursor). Defaults to 0.
+            limit (int, optional): Quantidade máxima de filmes. Defaults to None (todos).
+
+        Returns:
+            tuple: Filmes encontrados em ordem de ID e o cursor da próxima página (None se for a última)
+        """
+        with self._lock:
+            ids = None
+            if tag is not None:
+                ids = set(self._by_tag.get(tag, ()))
+            if year_from is not None or year_to is not None:
+                start = bisect.bisect_left(self._years, year_from) if year_from is not None else 0
+                end = bisect.bisect_right(self._years, year_to) if year_to is not None else len(self._years)
+                by_year = set().union(*(self._by_year[year] for year in self._years[start:end]))
+                ids = by_year if ids is None else ids & by_year
+            ids = self._ids if ids is None else sorted(ids)
+
+            start = (bisect.bisect_right(ids, after) if after is not None else 0) + offset
+            end = len(ids) if limit is None else start + limit
+            page = [self._movies[id] for id in ids[start:end]]
+            next_cursor = page[-1].id if page and end < len(ids) else None
+            return page, next_cursor
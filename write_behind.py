@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+
+"""
+Fila de gravação em segundo plano (write-behind) das alterações de filmes do main.py da raiz.
+
+As rotas de escrita alteram o store em memória (o ID é gerado na hora e as consultas já enxergam o filme)
+e só registram na fila qual filme mudou, respondendo sem esperar o disco. Uma tarefa asyncio chama a
+função de gravação numa thread a cada FLUSH_INTERVAL segundos ou assim que houver FLUSH_MAX_BATCH filmes
+pendentes, e no desligamento da aplicação o que estiver pendente é gravado antes de sair.
+
+O backend atual (JsonSnapshotBackend) só sabe gravar o snapshot inteiro, então o lote não é gravado
+filme a filme: ele só decide quando o snapshot é salvo de novo. Muitas alterações dentro do intervalo
+viram uma única gravação, mas cada gravação continua reescrevendo todos os filmes.
+"""
+
+logger = logging.getLogger(__name__)
+
+FLUSH_INTERVAL = float(os.getenv("MOVIE_STORE_FLUSH_INTERVAL", "1.0"))  # segundos
+FLUSH_MAX_BATCH = int(os.getenv("MOVIE_STORE_FLUSH_MAX_BATCH", "500"))  # filmes pendentes
+
+
+class WriteBehindQueue:
+    """Classe que acumula as alterações e as grava em lotes numa tarefa em segundo plano.
+
+    Args:
+        flush (callable): Função sem argumentos que grava o estado atual (ex: movie_store.save); roda numa
+            thread e pode bloquear no disco
+        interval (float): Intervalo máximo, em segundos, entre uma alteração e a sua gravação
+        max_batch (int): Quantidade de filmes pendentes que dispara a gravação antes do intervalo
+
+    Example:
+        queue = WriteBehindQueue(movie_store.save)
+        queue.enqueue(movie.id, "insert")
+        ...
+        await queue.stop()  # grava o que estiver pendente
+    """
+
+    def __init__(self, flush, interval: float = FLUSH_INTERVAL, max_batch: int = FLUSH_MAX_BATCH):
+        self.flush = flush
+        self.interval = interval
+        self.max_batch = max_batch
+        self._pending = {}  # id -> set de tipos de alteração ainda não gravados (só para disparo e métricas)
+        self._wakeup = None
+        self._task = None
+        self._stopping = False
+        self.enqueued = 0
+        self.flushes = 0
+        self.flushed = 0
+
+    def start(self):
+        """Função que inicia a tarefa de gravação no event loop atual (se ainda não estiver rodando)."""
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._stopping = False
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def enqueue(self, id: int, kind: str):
+        """Função que registra a alteração de um filme; deve ser chamada no event loop (rotas async def).
+
+        Args:
+            id (int): ID do filme alterado
+            kind (str): Tipo da alteração, ex: "insert" ou "thumbnail"
+        """
+        self._pending.setdefault(id, set()).add(kind)
+        self.enqueued += 1
+        # Inicia a tarefa sob demanda, caso a aplicação rode sem o lifespan (ex: nos benchmarks).
+        self.start()
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def _flush_pending(self):
+        if not self._pending:
+            return
+        batch, self._pending = self._pending, {}
+        try:
+            await asyncio.to_thread(self.flush)
+        except Exception:
+            # Os filmes voltam a ficar pendentes e a gravação é repetida na próxima rodada.
+            logger.exception("Falha ao gravar %d filmes; nova tentativa em %.1fs", len(batch), self.interval)
+            for id, kinds in batch.items():
+                self._pending.setdefault(id, set()).update(kinds)
+            return
+        self.flushes += 1
+        self.flushed += len(batch)
+
+    async def _run(self):
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush_pending()
+        # Gravação final do desligamento; a tarefa é a única que grava, então nunca há duas ao mesmo tempo.
+        await self._flush_pending()
+
+    async def stop(self):
+        """Função que encerra a tarefa depois de gravar todas as alterações pendentes."""
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None